@@ -30,6 +30,11 @@ def create_app(config_name='default'):
     # Register error handlers
     register_error_handlers(app)
     
+    # Templates check this before linking into an optional blueprint
+    @app.context_processor
+    def inject_enabled_blueprints():
+        return {'enabled_blueprints': app.blueprints.keys()}
+    
     # Shell context for flask shell
     @app.shell_context_processor
     def make_shell_context():
@@ -49,20 +54,32 @@ def create_app(config_name='default'):
 
 
 def register_blueprints(app):
-    """Register Flask blueprints"""
+    """Register Flask blueprints
+    
+    The optional modules are imported only when enabled, so an app built
+    without them skips their imports (Google API client, PDF parsing).
+    """
     from lsuite.auth import auth_bp
-    from lsuite.gmail import gmail_bp
-    from lsuite.erpnext import erpnext_bp
-    from lsuite.bridge import bridge_bp
-    from lsuite.api import api_bp
     from lsuite.main import main_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(gmail_bp, url_prefix='/gmail')
-    app.register_blueprint(erpnext_bp, url_prefix='/erpnext')
-    app.register_blueprint(bridge_bp, url_prefix='/bridge')
-    app.register_blueprint(api_bp, url_prefix='/api')
+    
+    if app.config.get('ENABLE_GMAIL_BLUEPRINT', True):
+        from lsuite.gmail import gmail_bp
+        app.register_blueprint(gmail_bp, url_prefix='/gmail')
+    
+    if app.config.get('ENABLE_ERPNEXT_BLUEPRINT', True):
+        from lsuite.erpnext import erpnext_bp
+        app.register_blueprint(erpnext_bp, url_prefix='/erpnext')
+    
+    if app.config.get('ENABLE_BRIDGE_BLUEPRINT', True):
+        from lsuite.bridge import bridge_bp
+        app.register_blueprint(bridge_bp, url_prefix='/bridge')
+    
+    if app.config.get('ENABLE_API_BLUEPRINT', True):
+        from lsuite.api import api_bp
+        app.register_blueprint(api_bp, url_prefix='/api')
 
 
 def register_error_handlers(app):
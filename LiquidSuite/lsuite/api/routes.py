@@ -6,6 +6,7 @@ REST API Routes
 """
 from flask import jsonify, request, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from lsuite.models import (
     EmailStatement, BankTransaction, TransactionCategory,
     ERPNextConfig, ERPNextSyncLog
@@ -91,7 +92,10 @@ def get_transactions():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', current_app.config['ITEMS_PER_PAGE'], type=int)
     
-    query = BankTransaction.query.order_by(BankTransaction.date.desc())
+    # serialize_transaction reads each row's category
+    query = BankTransaction.query.options(
+        joinedload(BankTransaction.category)
+    ).order_by(BankTransaction.date.desc())
     
     # Filters
     if request.args.get('uncategorized') == 'true':
@@ -7,6 +7,7 @@ Bridge Routes - Categorization and Bulk Operations
 """
 from flask import render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import login_required
+from sqlalchemy.orm import joinedload
 from lsuite.extensions import db
 from lsuite.models import TransactionCategory, BankTransaction, ERPNextConfig
 from lsuite.bridge.services import CategorizationService, BulkSyncService
@@ -219,7 +220,9 @@ def bulk_operations():
     erpnext_config = ERPNextConfig.query.filter_by(is_active=True).first()
     
     # Recent activity
-    recent_transactions = BankTransaction.query.order_by(
+    recent_transactions = BankTransaction.query.options(
+        joinedload(BankTransaction.category)
+    ).order_by(
         BankTransaction.date.desc()
     ).limit(10).all()
     
@@ -5,83 +5,118 @@
 Bridge Services - Categorization and Bulk Operations
 """
 import logging
+from collections import defaultdict
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload, load_only
 from lsuite.extensions import db
 from lsuite.models import TransactionCategory, BankTransaction
 from lsuite.erpnext.services import ERPNextService
 
 logger = logging.getLogger(__name__)
 
+# Ids per UPDATE ... WHERE id IN (...), well under SQLite's variable limit
+UPDATE_CHUNK_SIZE = 500
+
 
 class CategorizationService:
     """Transaction categorization service"""
     
+    def __init__(self):
+        self._match_keyword = None
+    
+    def _keyword_matcher(self):
+        """Matcher over the active categories, built once per service
+        instance; returns (category, keyword) for a description"""
+        if self._match_keyword is None:
+            self._match_keyword = TransactionCategory.compiled_keyword_matcher(
+                TransactionCategory.active_categories()
+            )
+        return self._match_keyword
+    
     def auto_categorize_all(self):
-        """Auto-categorize all uncategorized transactions"""
-        
-        # Get uncategorized transactions
-        uncategorized = BankTransaction.query.filter_by(
-            category_id=None,
-            erpnext_synced=False
-        ).all()
-        
-        if not uncategorized:
-            return 0, 0
+        """Auto-categorize all uncategorized transactions
+        
+        Streams only (id, description) and assigns categories with one
+        UPDATE per category and chunk of ids, not one per transaction.
+        A category's ids are written as soon as a chunk fills, so memory
+        stays bounded however many rows there are.
+        """
+        uncategorized = db.session.query(
+            BankTransaction.id, BankTransaction.description
+        ).filter(
+            BankTransaction.category_id.is_(None),
+            BankTransaction.erpnext_synced == False
+        )
         
-        # Get active categories
-        categories = TransactionCategory.query.filter_by(active=True).all()
+        # Nothing can match; report the total without streaming the rows
+        if not TransactionCategory.active_categories():
+            return 0, uncategorized.count()
         
-        categorized_count = 0
+        match_keyword = self._keyword_matcher()
+        pending = defaultdict(list)
+        categorized = defaultdict(int)
+        total = 0
         
-        for transaction in uncategorized:
-            category = self._find_matching_category(transaction, categories)
-            
+        for transaction_id, description in uncategorized.execution_options(yield_per=1000):
+            total += 1
+            category, _ = match_keyword(description)
             if category:
-                transaction.category_id = category.id
-                categorized_count += 1
-                logger.info(f"Auto-categorized transaction {transaction.id} as {category.name}")
-        
+                ids = pending[category.id]
+                ids.append(transaction_id)
+                if len(ids) >= UPDATE_CHUNK_SIZE:
+                    self._assign_category(category.id, ids)
+                    categorized[category.id] += len(ids)
+                    ids.clear()
+        
+        for category_id, ids in pending.items():
+            if ids:
+                self._assign_category(category_id, ids)
+                categorized[category_id] += len(ids)
+        
+        for category_id, count in categorized.items():
+            logger.info(f"Auto-categorized {count} transactions as category {category_id}")
+        
+        # One commit for the whole run
         db.session.commit()
         
-        return categorized_count, len(uncategorized)
+        return sum(categorized.values()), total
+    
+    def _assign_category(self, category_id, ids):
+        """Set category_id on the given transaction ids in one UPDATE"""
+        db.session.execute(
+            update(BankTransaction)
+            .where(BankTransaction.id.in_(ids))
+            .values(category_id=category_id)
+        )
     
     def _find_matching_category(self, transaction, categories):
         """Find matching category for transaction"""
         if not transaction.description:
             return None
         
-        description_lower = transaction.description.lower()
-        
-        # Try to find exact keyword matches
-        for category in categories:
-            if category.matches_description(description_lower):
-                return category
-        
-        return None
+        return TransactionCategory.compiled_matcher(categories)(transaction.description)
     
     def preview_categorization(self):
-        """Preview what will be categorized"""
-        uncategorized = BankTransaction.query.filter_by(
+        """Preview what will be categorized
+        
+        Only id and description are loaded; the rest of each row is
+        deferred until something touches it.
+        """
+        uncategorized = BankTransaction.query.options(
+            load_only(BankTransaction.id, BankTransaction.description)
+        ).filter_by(
             category_id=None,
             erpnext_synced=False
         ).all()
         
-        categories = TransactionCategory.query.filter_by(active=True).all()
-        
+        match_keyword = self._keyword_matcher()
         matches = []
         no_match = []
         
         for transaction in uncategorized:
-            category = self._find_matching_category(transaction, categories)
+            category, matched_keyword = match_keyword(transaction.description)
             
             if category:
-                # Find which keyword matched
-                matched_keyword = None
-                description_lower = transaction.description.lower()
-                for keyword in category.get_keywords_list():
-                    if keyword in description_lower:
-                        matched_keyword = keyword
-                        break
-                
                 matches.append({
                     'transaction': transaction,
                     'category': category,
@@ -101,11 +136,7 @@ class CategorizationService:
         if not description:
             return None
         
-        categories = TransactionCategory.query.filter_by(active=True).all()
-        return self._find_matching_category(
-            type('Transaction', (), {'description': description})(),
-            categories
-        )
+        return self._keyword_matcher()(description)[0]
 
 
 class BulkSyncService:
@@ -119,7 +150,9 @@ class BulkSyncService:
         """Sync all ready transactions"""
         
         # Get transactions ready to sync
-        ready_transactions = BankTransaction.query.filter(
+        ready_transactions = BankTransaction.query.options(
+            joinedload(BankTransaction.category)
+        ).filter(
             BankTransaction.category_id.isnot(None),
             BankTransaction.erpnext_synced == False
         ).all()
@@ -168,7 +201,9 @@ class BulkSyncService:
     def sync_by_date_range(self, start_date, end_date):
         """Sync transactions within date range"""
         
-        transactions = BankTransaction.query.filter(
+        transactions = BankTransaction.query.options(
+            joinedload(BankTransaction.category)
+        ).filter(
             BankTransaction.category_id.isnot(None),
             BankTransaction.erpnext_synced == False,
             BankTransaction.date >= start_date,
@@ -53,18 +53,21 @@ class ERPNextService:
         
         posting_date = transaction.date.strftime('%Y-%m-%d')
         
+        # Convert the amount once; it is reused for both journal lines
+        amount = abs(transaction.amount)
+        
         # Determine debit/credit based on transaction type
         if transaction.transaction_type == 'debit':
             # Money out: Credit bank, Debit expense
-            bank_credit = abs(float(transaction.amount))
+            bank_credit = amount
             bank_debit = 0
             expense_credit = 0
-            expense_debit = abs(float(transaction.amount))
+            expense_debit = amount
         else:  # credit
             # Money in: Debit bank, Credit income
             bank_credit = 0
-            bank_debit = abs(float(transaction.amount))
-            expense_credit = abs(float(transaction.amount))
+            bank_debit = amount
+            expense_credit = amount
             expense_debit = 0
         
         # Get ERPNext account from category
@@ -7,6 +7,8 @@ Gmail Routes - OAuth, Statement Import, CSV Upload
 from flask import render_template, redirect, url_for, flash, request, current_app, make_response
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
+from sqlalchemy import insert
+from sqlalchemy.orm import contains_eager
 from datetime import datetime
 import logging
 
@@ -171,8 +173,13 @@ def statement_detail(id):
         flash('Unauthorized', 'danger')
         return redirect(url_for('gmail.statements'))
     
-    transactions = BankTransaction.query.filter_by(
-        statement_id=statement.id
+    # The template shows each row's category; load it from the same JOIN
+    transactions = BankTransaction.query.outerjoin(
+        BankTransaction.category
+    ).options(
+        contains_eager(BankTransaction.category)
+    ).filter(
+        BankTransaction.statement_id == statement.id
     ).order_by(BankTransaction.date.desc()).all()
     
     return render_template('gmail/statement_detail.html', 
@@ -268,22 +275,27 @@ def transactions():
     page = request.args.get('page', 1, type=int)
     per_page = current_app.config.get('ITEMS_PER_PAGE', 20)
     
-    query = BankTransaction.query.filter_by(user_id=current_user.id)
+    # The template shows each row's category; load it from the same JOIN
+    query = BankTransaction.query.outerjoin(
+        BankTransaction.category
+    ).options(
+        contains_eager(BankTransaction.category)
+    ).filter(BankTransaction.user_id == current_user.id)
     
     # Apply filters
     if request.args.get('uncategorized'):
-        query = query.filter_by(category_id=None)
+        query = query.filter(BankTransaction.category_id.is_(None))
     
     if request.args.get('not_synced'):
-        query = query.filter_by(erpnext_synced=False)
+        query = query.filter(BankTransaction.erpnext_synced == False)
     
     category_id = request.args.get('category_id', type=int)
     if category_id:
-        query = query.filter_by(category_id=category_id)
+        query = query.filter(BankTransaction.category_id == category_id)
     
     statement_id = request.args.get('statement_id', type=int)
     if statement_id:
-        query = query.filter_by(statement_id=statement_id)
+        query = query.filter(BankTransaction.statement_id == statement_id)
     
     # Order and paginate
     transactions = query.order_by(
@@ -315,6 +327,64 @@ def transaction_detail(id):
 # CSV Upload Routes
 # ============================================================================
 
+def _import_csv_transactions(transactions, statement_id):
+    """Insert parsed CSV rows for the current user, skipping duplicates.
+    
+    New rows go out in one multi-row INSERT. That bypasses the mapper
+    events, so callers must set the statement's transaction_count.
+    Returns (imported, skipped).
+    """
+    rows = []
+    skipped = 0
+    # (date, description, amount) keys already queued, so duplicates inside
+    # the same file are caught without flushing row by row
+    queued_debits = set()
+    queued_credits = set()
+    
+    for trans_data in transactions:
+        key = (trans_data['transaction_date'], trans_data['description'])
+        
+        # Check for duplicates
+        if (key + (trans_data['debits'],) in queued_debits or
+                key + (trans_data['credits'],) in queued_credits):
+            skipped += 1
+            continue
+        
+        existing = BankTransaction.query.filter_by(
+            user_id=current_user.id,
+            date=trans_data['transaction_date'],
+            description=trans_data['description'],
+        ).filter(
+            (BankTransaction.withdrawal == trans_data['debits']) |
+            (BankTransaction.deposit == trans_data['credits'])
+        ).first()
+        
+        if existing:
+            skipped += 1
+            continue
+        
+        queued_debits.add(key + (trans_data['debits'],))
+        queued_credits.add(key + (trans_data['credits'],))
+        
+        # Map CSV fields onto BankTransaction columns
+        rows.append({
+            'user_id': current_user.id,
+            'statement_id': statement_id,
+            'date': trans_data['transaction_date'],
+            'posting_date': trans_data['posting_date'],
+            'description': trans_data['description'],
+            'withdrawal': trans_data['debits'],
+            'deposit': trans_data['credits'],
+            'balance': trans_data['balance'],
+            'reference_number': trans_data['reference'],
+        })
+    
+    if rows:
+        db.session.execute(insert(BankTransaction), rows)
+    
+    return len(rows), skipped
+
+
 @gmail_bp.route('/upload-csv', methods=['GET', 'POST'])
 @login_required
 def upload_csv():
@@ -369,38 +439,11 @@ def upload_csv():
                 statement_id = statement.id
             
             # Import transactions
-            imported_count = 0
-            skipped_count = 0
-            
-            for trans_data in transactions:
-                # Check for duplicates
-                existing = BankTransaction.query.filter_by(
-                    user_id=current_user.id,
-                    date=trans_data['transaction_date'],
-                    description=trans_data['description'],
-                ).filter(
-                    (BankTransaction.withdrawal == trans_data['debits']) |
-                    (BankTransaction.deposit == trans_data['credits'])
-                ).first()
-                
-                if existing:
-                    skipped_count += 1
-                    continue
-                
-                # Create transaction with proper field mapping
-                transaction = BankTransaction(
-                    user_id=current_user.id,
-                    statement_id=statement_id,
-                    date=trans_data['transaction_date'],
-                    posting_date=trans_data['posting_date'],
-                    description=trans_data['description'],
-                    withdrawal=trans_data['debits'],
-                    deposit=trans_data['credits'],
-                    balance=trans_data['balance'],
-                    reference_number=trans_data['reference']
-                )
-                db.session.add(transaction)
-                imported_count += 1
+            imported_count, skipped_count = _import_csv_transactions(
+                transactions, statement_id
+            )
+            if create_statement:
+                statement.transaction_count = imported_count
             
             db.session.commit()
             
@@ -470,37 +513,10 @@ def bulk_csv_import():
                 db.session.add(statement)
                 db.session.flush()
                 
-                imported = 0
-                skipped = 0
-                
-                for trans_data in transactions:
-                    # Check for duplicates
-                    existing = BankTransaction.query.filter_by(
-                        user_id=current_user.id,
-                        date=trans_data['transaction_date'],
-                        description=trans_data['description'],
-                    ).filter(
-                        (BankTransaction.withdrawal == trans_data['debits']) |
-                        (BankTransaction.deposit == trans_data['credits'])
-                    ).first()
-                    
-                    if existing:
-                        skipped += 1
-                        continue
-                    
-                    transaction = BankTransaction(
-                        user_id=current_user.id,
-                        statement_id=statement.id,
-                        date=trans_data['transaction_date'],
-                        posting_date=trans_data['posting_date'],
-                        description=trans_data['description'],
-                        withdrawal=trans_data['debits'],
-                        deposit=trans_data['credits'],
-                        balance=trans_data['balance'],
-                        reference_number=trans_data['reference']
-                    )
-                    db.session.add(transaction)
-                    imported += 1
+                imported, skipped = _import_csv_transactions(
+                    transactions, statement.id
+                )
+                statement.transaction_count = imported
                 
                 total_imported += imported
                 total_skipped += skipped
@@ -10,6 +10,8 @@ import requests
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from email.utils import parsedate_to_datetime
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
 
 from lsuite.extensions import db
 from lsuite.models import EmailStatement, BankTransaction
@@ -119,20 +121,24 @@ class GmailService:
         
         logger.info(f"Found {len(all_messages)} messages total")
         
-        imported_count = 0
-        skipped_count = 0
+        # A message can match several queries; look up the known ones at once
+        message_ids = list(dict.fromkeys(msg['id'] for msg in all_messages))
+        existing = {
+            gmail_id for (gmail_id,) in db.session.query(EmailStatement.gmail_id)
+            .filter(EmailStatement.gmail_id.in_(message_ids))
+        }
+        skipped_count = len(existing)
+        rows = []
         
-        for msg in all_messages:
+        for msg_id in message_ids:
+            if msg_id in existing:
+                continue
+            
             try:
-                # Check if already exists using gmail_id
-                if EmailStatement.query.filter_by(gmail_id=msg['id']).first():
-                    skipped_count += 1
-                    continue
-                
                 # Fetch full message
                 msg_data = service.users().messages().get(
                     userId='me', 
-                    id=msg['id'], 
+                    id=msg_id, 
                     format='full'
                 ).execute()
                 
@@ -195,29 +201,28 @@ class GmailService:
                             break
                 
                 # Create statement with correct field names
-                statement = EmailStatement(
-                    user_id=credential.user_id,
-                    gmail_id=msg['id'],
-                    subject=subject,
-                    sender=sender,
-                    received_date=msg_date,
-                    bank_name=bank_name,
-                    body_html=body_html,
-                    body_text=body_text,
-                    has_pdf=has_pdf,
-                    state='new'
-                )
-                
-                db.session.add(statement)
-                imported_count += 1
+                rows.append({
+                    'user_id': credential.user_id,
+                    'gmail_id': msg_id,
+                    'subject': subject,
+                    'sender': sender,
+                    'received_date': msg_date,
+                    'bank_name': bank_name,
+                    'body_html': body_html,
+                    'body_text': body_text,
+                    'has_pdf': has_pdf,
+                    'state': 'new'
+                })
                 
-                logger.info(f"Imported: {subject[:50]}")
+                logger.info(f"Fetched: {subject[:50]}")
                 
             except Exception as e:
                 logger.error(f"Error importing message: {str(e)}")
                 continue
         
         try:
+            imported_count = self._insert_new_statements(rows)
+            skipped_count += len(rows) - imported_count
             db.session.commit()
             logger.info(f"Successfully imported {imported_count} statements, skipped {skipped_count}")
         except Exception as e:
@@ -227,12 +232,35 @@ class GmailService:
         
         return imported_count, skipped_count
     
+    def _insert_new_statements(self, rows):
+        """Insert statement rows in one statement, skipping gmail_ids that
+        another import stored in the meantime; returns the number inserted"""
+        if not rows:
+            return 0
+        
+        dialect = db.session.get_bind(mapper=EmailStatement).dialect.name
+        if dialect == 'postgresql':
+            stmt = postgresql.insert(EmailStatement).on_conflict_do_nothing(
+                index_elements=['gmail_id']
+            )
+        elif dialect == 'sqlite':
+            stmt = sqlite.insert(EmailStatement).on_conflict_do_nothing(
+                index_elements=['gmail_id']
+            )
+        else:
+            stmt = insert(EmailStatement)
+        
+        ids = db.session.execute(stmt.returning(EmailStatement.id), rows).scalars().all()
+        return len(ids)
+    
     def download_and_parse_pdf(self, credential, statement):
         """Download PDF attachment and parse transactions"""
         service = self.build_service(credential)
         
-        # Delete existing transactions
+        # Delete existing transactions (bulk delete skips the count events)
         BankTransaction.query.filter_by(statement_id=statement.id).delete()
+        statement.transaction_count = 0
+        db.session.flush()
         
         try:
             # Get message with attachments
@@ -275,21 +303,24 @@ class GmailService:
             
             logger.info(f"Parsed {len(transactions)} transactions from PDF")
             
-            # Create transaction records
-            for trans in transactions:
-                transaction = BankTransaction(
-                    user_id=statement.user_id,
-                    statement_id=statement.id,
-                    date=trans['date'],
-                    description=trans['description'],
-                    deposit=trans['amount'] if trans['type'] == 'credit' else None,
-                    withdrawal=trans['amount'] if trans['type'] == 'debit' else None,
-                    reference_number=trans.get('reference', '')
-                )
-                db.session.add(transaction)
+            # Create transaction records in one multi-row INSERT
+            if transactions:
+                db.session.execute(insert(BankTransaction), [
+                    {
+                        'user_id': statement.user_id,
+                        'statement_id': statement.id,
+                        'date': trans['date'],
+                        'description': trans['description'],
+                        'deposit': trans['amount'] if trans['type'] == 'credit' else None,
+                        'withdrawal': trans['amount'] if trans['type'] == 'debit' else None,
+                        'reference_number': trans.get('reference', ''),
+                    }
+                    for trans in transactions
+                ])
             
             statement.state = 'parsed'
             statement.has_pdf = True
+            # Bulk insert skips the mapper events that maintain the count
             statement.transaction_count = len(transactions)
             
             db.session.commit()
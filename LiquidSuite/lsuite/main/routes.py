@@ -4,59 +4,92 @@
 """
 Main Blueprint - Dashboard and Home
 """
-from flask import render_template, jsonify
+import time
+from flask import render_template, jsonify, current_app
 from flask_login import login_required, current_user
 from lsuite.models import (
     EmailStatement, BankTransaction, TransactionCategory,
     ERPNextConfig, ERPNextSyncLog
 )
-from sqlalchemy import func
+from lsuite.extensions import db
+from sqlalchemy import func, case, select
+from sqlalchemy.orm import load_only
 from datetime import datetime
 from lsuite.main import main_bp
 
+# Monotonic timestamp of the last successful database probe
+_last_db_probe_ok = None
+
 
 @main_bp.route('/')
 @login_required
 def index():
     """Dashboard home page"""
+    # All reads below run on the request's session, which keeps a single
+    # connection and transaction checked out until teardown. A failed read
+    # is rolled back so the remaining ones don't hit an aborted transaction.
     
     try:
-        # Get statistics - with safe defaults
-        stats = {
-            'statements': EmailStatement.query.count(),
-            'transactions': BankTransaction.query.count(),
-            'categorized': BankTransaction.query.filter(
+        # Get statistics (and the ready-to-sync count) in one aggregate query
+        row = db.session.query(
+            select(func.count(EmailStatement.id)).scalar_subquery(),
+            func.count(BankTransaction.id),
+            func.count(BankTransaction.category_id),
+            func.count(case((BankTransaction.erpnext_synced == True, 1))),
+            func.count(case((
                 BankTransaction.category_id.isnot(None)
-            ).count(),
-            'synced': BankTransaction.query.filter_by(erpnext_synced=True).count(),
+                & (BankTransaction.erpnext_synced == False), 1
+            ))),
+        ).select_from(BankTransaction).one()
+        stats = {
+            'statements': row[0],
+            'transactions': row[1],
+            'categorized': row[2],
+            'synced': row[3],
         }
+        ready_to_sync = row[4]
     except Exception:
+        db.session.rollback()
         stats = {
             'statements': 0,
             'transactions': 0,
             'categorized': 0,
             'synced': 0
         }
+        ready_to_sync = 0
     
     try:
         # Recent statements
-        recent_statements = EmailStatement.query.order_by(
+        recent_statements = EmailStatement.query.options(
+            load_only(
+                EmailStatement.subject, EmailStatement.sender,
+                EmailStatement.received_date, EmailStatement.bank_name,
+                EmailStatement.state
+            )
+        ).order_by(
             EmailStatement.received_date.desc()
         ).limit(5).all()
     except Exception:
+        db.session.rollback()
         recent_statements = []
     
     try:
         # Recent transactions
-        recent_transactions = BankTransaction.query.order_by(
+        recent_transactions = BankTransaction.query.options(
+            load_only(
+                BankTransaction.date, BankTransaction.description,
+                BankTransaction.withdrawal, BankTransaction.deposit,
+                BankTransaction.category_id, BankTransaction.erpnext_synced
+            )
+        ).order_by(
             BankTransaction.date.desc()
         ).limit(10).all()
     except Exception:
+        db.session.rollback()
         recent_transactions = []
     
     try:
         # Category breakdown
-        from lsuite.extensions import db
         category_stats = db.session.query(
             TransactionCategory.name,
             func.count(BankTransaction.id).label('count')
@@ -66,31 +99,31 @@ def index():
             TransactionCategory.name
         ).all()
     except Exception:
+        db.session.rollback()
         category_stats = []
     
     try:
         # Recent sync logs
-        recent_syncs = ERPNextSyncLog.query.order_by(
+        recent_syncs = ERPNextSyncLog.query.options(
+            load_only(
+                ERPNextSyncLog.record_type, ERPNextSyncLog.record_id,
+                ERPNextSyncLog.status, ERPNextSyncLog.sync_date,
+                ERPNextSyncLog.erpnext_doc_name
+            )
+        ).order_by(
             ERPNextSyncLog.sync_date.desc()
         ).limit(5).all()
     except Exception:
+        db.session.rollback()
         recent_syncs = []
     
     try:
         # ERPNext config status
         erpnext_config = ERPNextConfig.query.filter_by(is_active=True).first()
     except Exception:
+        db.session.rollback()
         erpnext_config = None
     
-    try:
-        # Calculate ready to sync
-        ready_to_sync = BankTransaction.query.filter(
-            BankTransaction.category_id.isnot(None),
-            BankTransaction.erpnext_synced == False
-        ).count()
-    except Exception:
-        ready_to_sync = 0
-    
     return render_template(
         'main/index.html',
         stats=stats,
@@ -103,14 +136,28 @@ def index():
     )
 
 
+def _probe_database():
+    """Check the database, reusing a recent successful probe"""
+    global _last_db_probe_ok
+    
+    now = time.monotonic()
+    ttl = current_app.config.get('HEALTH_CHECK_TTL', 5)
+    if _last_db_probe_ok is not None and now - _last_db_probe_ok < ttl:
+        return 'healthy'
+    
+    # AUTOCOMMIT skips the BEGIN/ROLLBACK pair a session would wrap around this
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.exec_driver_sql('SELECT 1')
+    
+    _last_db_probe_ok = now
+    return 'healthy'
+
+
 @main_bp.route('/health')
 def health_check():
     """Health check endpoint for monitoring (no authentication required)"""
     try:
-        from lsuite.extensions import db
-        # Test database connection
-        db.session.execute(db.text('SELECT 1'))
-        db_status = 'healthy'
+        db_status = _probe_database()
     except Exception as e:
         db_status = f'unhealthy: {str(e)}'
     
@@ -3,11 +3,49 @@
 Database models for LiquidSuite - COMPLETE FIXED VERSION
 """
 
+import re
+from functools import lru_cache
+try:
+    import ahocorasick
+except ImportError:  # optional; keyword matching falls back to one regex
+    ahocorasick = None
+from flask import current_app, g
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import deferred, make_transient_to_detached
+from sqlalchemy.sql.expression import FunctionElement
 from lsuite.extensions import db
 
+
+class utcnow(FunctionElement):
+    """Current time in UTC, as the naive timestamp the DateTime columns hold.
+    
+    func.now() returns the session's local time on Postgres, which would
+    not match the datetime.utcnow() values written from Python.
+    """
+    type = db.DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return 'CURRENT_TIMESTAMP'  # UTC on SQLite
+
+
+@compiles(utcnow, 'postgresql')
+def _utcnow_postgresql(element, compiler, **kw):
+    return "timezone('utc', now())"
+
+# Relationship loading rule: collections stay lazy='dynamic' (or 'selectin'),
+# never 'joined'. A joinedload of a one-to-many multiplies the parent rows, and
+# stacking several makes the result quadratic. When a query already JOINs the
+# related table for filtering or sorting, reuse that join with contains_eager()
+# rather than adding a second JOIN through joinedload().
+
 # =============================================================================
 # User Models
 # =============================================================================
@@ -19,13 +57,13 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(255), nullable=False)
+    password_hash = deferred(db.Column(db.String(255), nullable=False))  # Only read by check_password
     first_name = db.Column(db.String(50))
     last_name = db.Column(db.String(50))
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     bank_accounts = db.relationship('BankAccount', backref='user', lazy='dynamic', cascade='all, delete-orphan')
@@ -36,7 +74,12 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        # PASSWORD_HASH_METHOD lets the test config swap in a cheap hasher
+        method = current_app.config.get('PASSWORD_HASH_METHOD')
+        if method:
+            self.password_hash = generate_password_hash(password, method=method)
+        else:
+            self.password_hash = generate_password_hash(password)
     
     def check_password(self, password):
         """Check password against hash"""
@@ -70,8 +113,8 @@ class BankAccount(db.Model):
     currency = db.Column(db.String(3), default='ZAR')
     balance = db.Column(db.Numeric(15, 2), default=0.00)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     transactions = db.relationship('Transaction', backref='bank_account', lazy='dynamic', cascade='all, delete-orphan')
@@ -89,14 +132,14 @@ class Transaction(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     bank_account_id = db.Column(db.Integer, db.ForeignKey('bank_accounts.id'), nullable=False)
     
-    transaction_date = db.Column(db.Date, nullable=False, index=True)
+    transaction_date = db.Column(db.Date, nullable=False)
     posting_date = db.Column(db.Date)
     description = db.Column(db.String(500), nullable=False)
     reference_number = db.Column(db.String(100), index=True)
     
     # Amount fields
-    debit = db.Column(db.Numeric(15, 2), default=0.00)
-    credit = db.Column(db.Numeric(15, 2), default=0.00)
+    debit = db.Column(db.Numeric(15, 2), default=Decimal('0.00'))
+    credit = db.Column(db.Numeric(15, 2), default=Decimal('0.00'))
     balance = db.Column(db.Numeric(15, 2))
     
     # Categorization
@@ -110,13 +153,20 @@ class Transaction(db.Model):
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'))
     
     # Metadata
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
+    
+    # Indexes - descending so ORDER BY ... DESC LIMIT is a forward scan on every engine
+    __table_args__ = (
+        db.Index('ix_txn_date_desc', transaction_date.desc()),
+    )
+    
+    invoice = db.relationship('Invoice', back_populates='transactions')
 
     @property
     def amount(self):
         """Get transaction amount (credit - debit)"""
-        return float(self.credit or 0) - float(self.debit or 0)
+        return float((self.credit or 0) - (self.debit or 0))
     
     @property
     def transaction_type(self):
@@ -144,8 +194,8 @@ class GoogleCredential(db.Model):
     refresh_token = db.Column(db.Text)
     token_expiry = db.Column(db.DateTime)
     is_authenticated = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
     
     def __repr__(self):
         return f'<GoogleCredential {self.name}>'
@@ -162,28 +212,188 @@ class TransactionCategory(db.Model):
     keywords = db.Column(db.Text)
     active = db.Column(db.Boolean, default=True)
     color = db.Column(db.Integer)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationship
     transactions = db.relationship('BankTransaction', back_populates='category', lazy='dynamic')
     
     def get_keywords_list(self):
         """Return keywords as a list"""
-        if not self.keywords:
-            return []
-        return [k.strip().lower() for k in self.keywords.split(',')]
+        return list(_parse_keywords(self.keywords))
     
     def matches_description(self, description):
         """Check if any keyword matches the description"""
-        if not description:
+        if not description or description.isspace():
             return False
-        description_lower = description.lower()
-        return any(keyword in description_lower for keyword in self.get_keywords_list())
+        automaton = _build_keyword_automaton((self.keywords,))
+        return _first_keyword_match(automaton, description) is not None
+    
+    @staticmethod
+    def compiled_matcher(categories):
+        """Return a function that finds the first of `categories` matching
+        a description, scanning it once with an Aho-Corasick automaton"""
+        match_keyword = TransactionCategory.compiled_keyword_matcher(categories)
+        
+        def match(description):
+            return match_keyword(description)[0]
+        
+        return match
+    
+    @staticmethod
+    def compiled_keyword_matcher(categories):
+        """Like compiled_matcher, but the function returns a
+        (category, keyword) pair, or (None, None) when nothing matches"""
+        categories = list(categories)
+        automaton = _build_keyword_automaton(tuple(c.keywords for c in categories))
+        
+        def match(description):
+            if not description or description.isspace():
+                return None, None
+            found = _first_keyword_match(automaton, description)
+            if found is None:
+                return None, None
+            return categories[found[0]], found[1]
+        
+        return match
+    
+    @classmethod
+    def active_categories(cls):
+        """Active categories, served from an in-process cache.
+        
+        The cache is keyed by the engine, the table's row count and latest
+        updated_at (read once per app context) and a counter bumped on local
+        writes.
+        Categories already in the session are returned as they are, so
+        their pending changes survive; the rest are merged in from the
+        cached rows without a query.
+        
+        Limits of the version key: other processes' writes are only seen
+        through updated_at, so two updates within the timestamp's
+        resolution (a second on SQLite's CURRENT_TIMESTAMP) can look like
+        one, and on databases without fix_schema's touch trigger a raw-SQL
+        UPDATE that leaves updated_at alone goes unnoticed until the next
+        local write.
+        """
+        if 'category_version' not in g:
+            g.category_version = tuple(db.session.query(
+                db.func.count(cls.id), db.func.max(cls.updated_at)
+            ).one())
+        key = (db.engine, g.category_version, _category_cache['generation'])
+        
+        # Read and replace the (key, rows) pair as one tuple so a concurrent
+        # request never pairs one snapshot's key with another's rows
+        cached_key, rows = _category_cache['snapshot']
+        if cached_key != key:
+            columns = [c.key for c in cls.__table__.columns]
+            rows = [
+                {c: getattr(category, c) for c in columns}
+                for category in cls.query.filter_by(active=True).all()
+            ]
+            _category_cache['snapshot'] = (key, rows)
+        
+        categories = []
+        for row in rows:
+            category = db.session.identity_map.get(
+                db.session.identity_key(cls, row['id'])
+            )
+            if category is None:
+                category = cls(**row)
+                make_transient_to_detached(category)
+                category = db.session.merge(category, load=False)
+            categories.append(category)
+        return categories
     
     def __repr__(self):
         return f'<TransactionCategory {self.name}>'
 
 
+# Column snapshots of the active categories; see active_categories()
+_category_cache = {'snapshot': (None, []), 'generation': 0}
+
+
+@lru_cache(maxsize=256)
+def _parse_keywords(keywords):
+    """Split a comma-separated keywords string into lower-cased keywords.
+    
+    Cached by the string itself, so editing a category's keywords simply
+    misses the cache; nothing has to be invalidated.
+    """
+    if not keywords:
+        return ()
+    return tuple(k for k in (k.strip().lower() for k in keywords.split(',')) if k)
+
+
+@lru_cache(maxsize=32)
+def _build_keyword_automaton(keyword_lists):
+    """Build one matcher over comma-separated keyword lists.
+    
+    With pyahocorasick installed this is an Aho-Corasick automaton mapping
+    each keyword to (list index, keyword), so a single pass over a
+    description reports every keyword it contains and which list owns it.
+    Without it, _compile_keyword_pattern builds an equivalent regex.
+    Returns None when there are no keywords at all.
+    """
+    if ahocorasick is None:
+        return _compile_keyword_pattern(keyword_lists)
+    
+    automaton = ahocorasick.Automaton()
+    for index, keywords in enumerate(keyword_lists):
+        for keyword in _parse_keywords(keywords):
+            # A keyword shared by several lists belongs to the first one
+            if keyword not in automaton:
+                automaton.add_word(keyword, (index, keyword))
+    
+    if len(automaton) == 0:
+        return None
+    automaton.make_automaton()
+    return automaton
+
+
+def _compile_keyword_pattern(keyword_lists):
+    """Compile keyword lists into one anchored regex.
+    
+    Each list becomes a lookahead branch whose group c<index> captures the
+    keyword; alternation tries branches in order, so the first list with a
+    keyword anywhere in the text wins and match.lastgroup names it.
+    """
+    branches = []
+    for index, keywords in enumerate(keyword_lists):
+        keywords = _parse_keywords(keywords)
+        if not keywords:
+            continue
+        # Longest first, so the reported keyword is the most specific one
+        alternatives = '|'.join(
+            re.escape(k) for k in sorted(keywords, key=len, reverse=True)
+        )
+        branches.append(f'(?=.*?(?P<c{index}>{alternatives}))')
+    
+    if not branches:
+        return None
+    return re.compile('|'.join(branches), re.DOTALL)
+
+
+def _first_keyword_match(matcher, description):
+    """(list index, keyword) of the earliest keyword list with a keyword in
+    the description, or None. Earlier lists win regardless of where in the
+    text their keyword appears."""
+    if matcher is None:
+        return None
+    if isinstance(matcher, re.Pattern):
+        found = matcher.match(description.lower())
+        if found is None:
+            return None
+        return int(found.lastgroup[1:]), found.group(found.lastgroup)
+    
+    best = None
+    for _, found in matcher.iter(description.lower()):
+        if best is None or found[0] < best[0]:
+            best = found
+            if best[0] == 0:
+                break
+    return best
+
+
 class BankTransaction(db.Model):
     """Bank transaction model for ERPNext integration"""
     __tablename__ = 'bank_transactions'
@@ -191,17 +401,17 @@ class BankTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     bank_account_id = db.Column(db.Integer, db.ForeignKey('bank_accounts.id'))
-    statement_id = db.Column(db.Integer, db.ForeignKey('email_statements.id'))
+    statement_id = db.Column(db.Integer, db.ForeignKey('email_statements.id'), index=True)
     
     # Transaction details
-    date = db.Column(db.Date, nullable=False, index=True)
+    date = db.Column(db.Date, nullable=False)
     posting_date = db.Column(db.Date, index=True)
     description = db.Column(db.String(500), nullable=False)
     reference_number = db.Column(db.String(100), index=True)
     
     # Amounts
-    deposit = db.Column(db.Numeric(15, 2), default=0.00)
-    withdrawal = db.Column(db.Numeric(15, 2), default=0.00)
+    deposit = db.Column(db.Numeric(15, 2), default=Decimal('0.00'))
+    withdrawal = db.Column(db.Numeric(15, 2), default=Decimal('0.00'))
     balance = db.Column(db.Numeric(15, 2))
     
     # Additional fields
@@ -226,16 +436,33 @@ class BankTransaction(db.Model):
     erpnext_error = db.Column(db.Text)
     
     # Metadata
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
+    
+    # Indexes - covering index for the dashboard's "latest transactions" read,
+    # and a partial index holding only the rows auto-categorization scans
+    __table_args__ = (
+        db.Index(
+            'ix_bt_recent', date.desc(),
+            postgresql_include=['description', 'withdrawal', 'deposit',
+                                'category_id', 'erpnext_synced']
+        ),
+        db.Index(
+            'ix_bt_uncategorized', user_id, id,
+            postgresql_include=['description'],
+            postgresql_where=db.text('category_id IS NULL AND NOT erpnext_synced'),
+            sqlite_where=db.text('category_id IS NULL AND NOT erpnext_synced'),
+        ),
+    )
     
     # Relationship to category
     category = db.relationship('TransactionCategory', back_populates='transactions')
+    invoice = db.relationship('Invoice', back_populates='bank_transactions')
 
     @property
     def amount(self):
         """Get transaction amount"""
-        return float(self.deposit or 0) - float(self.withdrawal or 0)
+        return float((self.deposit or 0) - (self.withdrawal or 0))
     
     @property
     def transaction_type(self):
@@ -265,6 +492,39 @@ class BankTransaction(db.Model):
             "unallocated_amount": float(self.unallocated_amount or 0)
         }
     
+    @classmethod
+    def to_erpnext_format_bulk(cls, *criteria):
+        """Build to_erpnext_format() dicts straight from rows, skipping ORM
+        object construction. Defaults to all unsynced transactions."""
+        if not criteria:
+            criteria = (cls.erpnext_synced == False,)
+        
+        rows = db.session.execute(
+            db.select(
+                cls.date, cls.posting_date, cls.description, cls.deposit,
+                cls.withdrawal, cls.currency, BankAccount.account_name,
+                cls.reference_number, cls.unallocated_amount
+            ).outerjoin(
+                BankAccount, cls.bank_account_id == BankAccount.id
+            ).where(*criteria).order_by(cls.id)
+        )
+        
+        return [
+            {
+                "date": txn_date.isoformat() if txn_date else None,
+                "posting_date": posting_date.isoformat() if posting_date else None,
+                "description": description,
+                "deposit": float(deposit or 0),
+                "withdrawal": float(withdrawal or 0),
+                "currency": currency,
+                "bank_account": account_name,
+                "reference_number": reference_number,
+                "unallocated_amount": float(unallocated_amount or 0)
+            }
+            for (txn_date, posting_date, description, deposit, withdrawal, currency,
+                 account_name, reference_number, unallocated_amount) in rows
+        ]
+    
     def __repr__(self):
         return f'<BankTransaction {self.reference_number or self.id}>'
 
@@ -285,7 +545,7 @@ class EmailStatement(db.Model):
     thread_id = db.Column(db.String(255), index=True)
     subject = db.Column(db.String(500))
     sender = db.Column(db.String(255))
-    received_date = db.Column(db.DateTime, index=True)
+    received_date = db.Column(db.DateTime)
     
     # Statement details
     statement_date = db.Column(db.Date, index=True)
@@ -300,18 +560,26 @@ class EmailStatement(db.Model):
     state = db.Column(db.String(50), default='new')
     is_processed = db.Column(db.Boolean, default=False)
     processed_date = db.Column(db.DateTime)
-    transaction_count = db.Column(db.Integer, default=0)
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by BankTransaction events
     
-    # Content
-    body_text = db.Column(db.Text)
-    body_html = db.Column(db.Text)
+    # Content - deferred so list queries don't pull message bodies
+    body_text = deferred(db.Column(db.Text), group='body')
+    body_html = deferred(db.Column(db.Text), group='body')
     
     # Errors
     error_message = db.Column(db.Text)
     
     # Metadata
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
+    
+    # Indexes - covering index for the dashboard's "latest statements" read
+    __table_args__ = (
+        db.Index(
+            'ix_es_recent', received_date.desc(),
+            postgresql_include=['subject', 'sender', 'bank_name', 'state']
+        ),
+    )
     
     # Relationships
     transactions = db.relationship('BankTransaction', backref='statement', lazy='dynamic', cascade='all, delete-orphan')
@@ -324,6 +592,34 @@ class EmailStatement(db.Model):
 # Invoice Models
 # =============================================================================
 
+class MoneyCents(db.TypeDecorator):
+    """Money stored as integer cents and exposed as a 2-place Decimal"""
+    impl = db.BigInteger
+    cache_ok = True
+    
+    @staticmethod
+    def to_cents(value):
+        """Convert a Decimal/float/int amount to integer cents"""
+        if value is None:
+            return None
+        if isinstance(value, float):
+            value = str(value)
+        return int((Decimal(value) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    
+    @staticmethod
+    def from_cents(cents):
+        """Convert integer cents back to a 2-place Decimal"""
+        if cents is None:
+            return None
+        return Decimal(cents).scaleb(-2)
+    
+    def process_bind_param(self, value, dialect):
+        return self.to_cents(value)
+    
+    def process_result_value(self, value, dialect):
+        return self.from_cents(value)
+
+
 class Invoice(db.Model):
     """Invoice model"""
     __tablename__ = 'invoices'
@@ -342,13 +638,17 @@ class Invoice(db.Model):
     customer_address = db.Column(db.Text)
     
     # Financial details
-    subtotal = db.Column(db.Numeric(15, 2), nullable=False, default=0.00)
-    tax_amount = db.Column(db.Numeric(15, 2), default=0.00)
+    subtotal = db.Column(MoneyCents, nullable=False, default=Decimal('0.00'))
+    tax_amount = db.Column(MoneyCents, default=Decimal('0.00'))
     tax_rate = db.Column(db.Numeric(5, 2), default=0.00)
-    discount_amount = db.Column(db.Numeric(15, 2), default=0.00)
-    total_amount = db.Column(db.Numeric(15, 2), nullable=False, default=0.00)
-    paid_amount = db.Column(db.Numeric(15, 2), default=0.00)
-    outstanding_amount = db.Column(db.Numeric(15, 2), default=0.00)
+    discount_amount = db.Column(MoneyCents, default=Decimal('0.00'))
+    total_amount = db.Column(MoneyCents, nullable=False, default=Decimal('0.00'))
+    paid_amount = db.Column(MoneyCents, default=Decimal('0.00'))
+    # Maintained by the database so set-based paid_amount updates stay consistent
+    outstanding_amount = db.Column(
+        MoneyCents,
+        db.Computed('COALESCE(total_amount, 0) - COALESCE(paid_amount, 0)', persisted=True)
+    )
     
     currency = db.Column(db.String(3), default='ZAR')
     
@@ -363,18 +663,27 @@ class Invoice(db.Model):
     # Metadata
     notes = db.Column(db.Text)
     terms = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Relationships
-    items = db.relationship('InvoiceItem', backref='invoice', lazy='dynamic', cascade='all, delete-orphan')
-    transactions = db.relationship('Transaction', backref='invoice', lazy='dynamic')
-    bank_transactions = db.relationship('BankTransaction', backref='invoice', lazy='dynamic')
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
+    
+    # Indexes - per-user status/overdue lookups, index-only on Postgres
+    __table_args__ = (
+        db.Index(
+            'ix_invoices_user_status_due', user_id, status, due_date,
+            postgresql_include=['outstanding_amount', 'total_amount']
+        ),
+    )
+    
+    # Relationships - items load with the invoice in one IN query; use
+    # selectinload() for the payment collections when listing invoices
+    items = db.relationship('InvoiceItem', back_populates='invoice', lazy='selectin', cascade='all, delete-orphan')
+    transactions = db.relationship('Transaction', back_populates='invoice')
+    bank_transactions = db.relationship('BankTransaction', back_populates='invoice')
     
     @property
     def is_paid(self):
         """Check if invoice is fully paid"""
-        return self.outstanding_amount <= 0
+        return (self.outstanding_amount or 0) <= 0
     
     @property
     def is_overdue(self):
@@ -385,10 +694,90 @@ class Invoice(db.Model):
     
     def calculate_totals(self):
         """Recalculate invoice totals from items"""
-        self.subtotal = sum(item.total for item in self.items)
-        self.tax_amount = self.subtotal * (self.tax_rate / 100)
-        self.total_amount = self.subtotal + self.tax_amount - self.discount_amount
-        self.outstanding_amount = self.total_amount - self.paid_amount
+        if self.id is None:
+            # Not flushed yet, so the items exist only in memory
+            subtotal = sum((item.total or 0 for item in self.items), Decimal('0'))
+        else:
+            # Sum the line totals in the database instead of loading every item
+            subtotal = db.session.query(
+                db.func.coalesce(db.func.sum(InvoiceItem.total), 0)
+            ).filter(InvoiceItem.invoice_id == self.id).scalar()
+        
+        # Integer arithmetic on cents; tax_rate is a percentage in hundredths
+        subtotal_cents = MoneyCents.to_cents(subtotal)
+        rate_hundredths = MoneyCents.to_cents(self.tax_rate or 0)
+        tax_cents = (subtotal_cents * rate_hundredths + 5000) // 10000
+        total_cents = subtotal_cents + tax_cents - MoneyCents.to_cents(self.discount_amount or 0)
+        
+        self.subtotal = MoneyCents.from_cents(subtotal_cents)
+        self.tax_amount = MoneyCents.from_cents(tax_cents)
+        self.total_amount = MoneyCents.from_cents(total_cents)
+        # outstanding_amount is a generated column, refreshed on flush
+    
+    @classmethod
+    def recompute_totals(cls, ids):
+        """Set-based calculate_totals() for many invoices at once.
+        
+        Issues two UPDATEs regardless of how many invoices are given; the
+        invoices already loaded in the session are not refreshed.
+        """
+        ids = list(ids)
+        if not ids:
+            return
+        
+        subtotal = db.select(
+            db.func.coalesce(db.func.sum(InvoiceItem.total), 0)
+        ).where(InvoiceItem.invoice_id == cls.id).scalar_subquery()
+        db.session.execute(
+            db.update(cls).where(cls.id.in_(ids)).values(subtotal=subtotal),
+            execution_options={'synchronize_session': False}
+        )
+        
+        # Same integer-cents rounding as calculate_totals()
+        rate_hundredths = db.cast(
+            db.func.round(db.func.coalesce(cls.tax_rate, 0) * 100), db.BigInteger
+        )
+        tax = (cls.subtotal * rate_hundredths + 5000) // 10000
+        db.session.execute(
+            db.update(cls).where(cls.id.in_(ids)).values(
+                tax_amount=tax,
+                total_amount=cls.subtotal + tax - db.func.coalesce(cls.discount_amount, 0)
+            ),
+            execution_options={'synchronize_session': False}
+        )
+    
+    @staticmethod
+    def refresh_status_view():
+        """Refresh mv_invoice_status, the per-status rollup view.
+        
+        The view is created by scripts/fix_schema.py on Postgres only, so
+        this returns False without touching the database when it is missing.
+        Run it from the scheduled tasks rather than after every commit.
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        
+        with db.engine.begin() as conn:
+            if conn.exec_driver_sql(
+                "SELECT to_regclass('mv_invoice_status')"
+            ).scalar() is None:
+                return False
+            conn.exec_driver_sql(
+                'REFRESH MATERIALIZED VIEW CONCURRENTLY mv_invoice_status'
+            )
+        return True
+    
+    def recent_transactions(self, limit=20):
+        """Latest ledger transactions linked to this invoice"""
+        return Transaction.query.filter_by(invoice_id=self.id).order_by(
+            Transaction.transaction_date.desc()
+        ).limit(limit).all()
+    
+    def recent_bank_transactions(self, limit=20):
+        """Latest bank transactions linked to this invoice"""
+        return BankTransaction.query.filter_by(invoice_id=self.id).order_by(
+            BankTransaction.date.desc()
+        ).limit(limit).all()
     
     def __repr__(self):
         return f'<Invoice {self.invoice_number}>'
@@ -399,21 +788,24 @@ class InvoiceItem(db.Model):
     __tablename__ = 'invoice_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False, index=True)
     
     item_code = db.Column(db.String(100))
     description = db.Column(db.String(500), nullable=False)
-    quantity = db.Column(db.Numeric(10, 2), nullable=False, default=1)
-    unit_price = db.Column(db.Numeric(15, 2), nullable=False)
-    total = db.Column(db.Numeric(15, 2), nullable=False)
+    quantity = db.Column(MoneyCents, nullable=False, default=Decimal('1.00'))  # Hundredths of a unit
+    unit_price = db.Column(MoneyCents, nullable=False)
+    total = db.Column(MoneyCents, nullable=False)
     
     # Metadata
     notes = db.Column(db.String(500))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    
+    invoice = db.relationship('Invoice', back_populates='items')
     
     def calculate_total(self):
         """Calculate line item total"""
-        self.total = self.quantity * self.unit_price
+        cents = MoneyCents.to_cents(self.quantity) * MoneyCents.to_cents(self.unit_price)
+        self.total = MoneyCents.from_cents((cents + 50) // 100)
     
     def __repr__(self):
         return f'<InvoiceItem {self.description[:30]}>'
@@ -442,8 +834,8 @@ class ERPNextConfig(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     last_sync = db.Column(db.DateTime)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utcnow())
+    updated_at = db.Column(db.DateTime, server_default=utcnow(), onupdate=utcnow())
     
     def __repr__(self):
         return f'<ERPNextConfig {self.name}>'
@@ -465,7 +857,7 @@ class ERPNextSyncLog(db.Model):
     status = db.Column(db.String(20), nullable=False)
     error_message = db.Column(db.Text)
     
-    sync_date = db.Column(db.DateTime, default=datetime.utcnow)
+    sync_date = db.Column(db.DateTime, server_default=utcnow())
     
     def __repr__(self):
         return f'<ERPNextSyncLog {self.record_type}:{self.record_id} {self.status}>'
@@ -473,3 +865,35 @@ class ERPNextSyncLog(db.Model):
 
 # Alias for backwards compatibility
 SyncLog = ERPNextSyncLog
+
+
+# Keep EmailStatement.transaction_count in step with its BankTransaction rows.
+# Only ORM unit-of-work inserts/deletes fire these; bulk Query.delete() and
+# Core inserts must adjust the count themselves.
+def _adjust_transaction_count(connection, transaction, delta):
+    if transaction.statement_id is None:
+        return
+    statements = EmailStatement.__table__
+    connection.execute(
+        statements.update()
+        .where(statements.c.id == transaction.statement_id)
+        .values(transaction_count=statements.c.transaction_count + delta)
+    )
+
+
+@event.listens_for(BankTransaction, 'after_insert')
+def _increment_transaction_count(mapper, connection, target):
+    _adjust_transaction_count(connection, target, 1)
+
+
+@event.listens_for(BankTransaction, 'after_delete')
+def _decrement_transaction_count(mapper, connection, target):
+    _adjust_transaction_count(connection, target, -1)
+
+
+# Drop cached categories whenever this process writes one
+@event.listens_for(TransactionCategory, 'after_insert')
+@event.listens_for(TransactionCategory, 'after_update')
+@event.listens_for(TransactionCategory, 'after_delete')
+def _invalidate_category_cache(mapper, connection, target):
+    _category_cache['generation'] += 1
@@ -21,7 +21,7 @@ from lsuite import create_app
 from lsuite.extensions import db
 from lsuite.models import (
     BankTransaction, TransactionCategory, 
-    ERPNextConfig, GoogleCredential
+    ERPNextConfig, GoogleCredential, Invoice
 )
 from lsuite.bridge.services import CategorizationService, BulkSyncService
 from lsuite.gmail.services import GmailService
@@ -129,6 +129,25 @@ def run_gmail_import():
         return False
 
 
+def run_invoice_status_refresh():
+    """Refresh the invoice status rollup view"""
+    logger.info("=" * 60)
+    logger.info("Task: Invoice Status Refresh")
+    logger.info("=" * 60)
+    
+    try:
+        if Invoice.refresh_status_view():
+            logger.info("✓ Refreshed mv_invoice_status")
+        else:
+            logger.info("ℹ mv_invoice_status not present - skipping refresh")
+        
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Invoice status refresh failed: {str(e)}")
+        return False
+
+
 def run_statistics():
     """Log current statistics"""
     logger.info("=" * 60)
@@ -174,6 +193,7 @@ def main():
             'auto_categorization': False,
             'erpnext_sync': False,
             'gmail_import': False,
+            'invoice_status_refresh': False,
             'statistics': False
         }
         
@@ -182,6 +202,7 @@ def main():
         results['gmail_import'] = run_gmail_import()
         results['auto_categorization'] = run_auto_categorization()
         results['erpnext_sync'] = run_erpnext_sync()
+        results['invoice_status_refresh'] = run_invoice_status_refresh()
         
         # Final statistics
         run_statistics()
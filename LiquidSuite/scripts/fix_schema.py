@@ -8,6 +8,7 @@ Fixes database schema issues for existing deployments
 """
 import os
 import sys
+from datetime import date
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,6 +16,65 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sqlalchemy import create_engine, text
 
 
+def create_month_partitions(conn, first_month, last_month=None, months_ahead=12):
+    """Create monthly bank_transactions partitions from first_month through
+    last_month or months_ahead months from now, whichever is later.
+    
+    Rows already sitting in the default partition for a new month are
+    moved into it: the default is detached, the month created, the rows
+    re-inserted through the parent, and the default re-attached.
+    """
+    today = date.today()
+    last = (today.year * 12 + today.month - 1) + months_ahead
+    if last_month:
+        last = max(last, last_month.year * 12 + last_month.month - 1)
+    month = first_month.year * 12 + first_month.month - 1
+    has_default = conn.execute(text(
+        "SELECT to_regclass('bank_transactions_default')"
+    )).scalar() is not None
+    
+    while month <= last:
+        year, index = divmod(month, 12)
+        start = date(year, index + 1, 1)
+        year, index = divmod(month + 1, 12)
+        end = date(year, index + 1, 1)
+        month += 1
+        name = f"bank_transactions_y{start:%Y}m{start:%m}"
+        
+        if conn.execute(text(f"SELECT to_regclass('{name}')")).scalar() is not None:
+            continue
+        
+        stranded = has_default and conn.execute(text(f"""
+            SELECT EXISTS (
+                SELECT 1 FROM bank_transactions_default
+                WHERE date >= '{start}' AND date < '{end}'
+            )
+        """)).scalar()
+        if stranded:
+            conn.execute(text(
+                "ALTER TABLE bank_transactions DETACH PARTITION bank_transactions_default"
+            ))
+        
+        conn.execute(text(f"""
+            CREATE TABLE {name}
+            PARTITION OF bank_transactions
+            FOR VALUES FROM ('{start}') TO ('{end}')
+        """))
+        
+        if stranded:
+            conn.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM bank_transactions_default
+                    WHERE date >= '{start}' AND date < '{end}'
+                    RETURNING *
+                )
+                INSERT INTO bank_transactions SELECT * FROM moved
+            """))
+            conn.execute(text(
+                "ALTER TABLE bank_transactions ATTACH PARTITION bank_transactions_default DEFAULT"
+            ))
+
+
 def fix_database_schema():
     """Fix database schema issues"""
     print("🔧 Fixing Database Schema...")
@@ -110,6 +170,253 @@ def fix_database_schema():
                     """))
                     print("   ✅ Fixed!")
                 
+                print("\n3️⃣ Adding performance indexes...")
+                
+                # Covering indexes for the dashboard's ORDER BY ... LIMIT reads
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_es_recent
+                    ON email_statements (received_date DESC)
+                    INCLUDE (subject, sender, bank_name, state)
+                """))
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_bt_recent
+                    ON bank_transactions (date DESC)
+                    INCLUDE (description, withdrawal, deposit, category_id, erpnext_synced)
+                """))
+                # Partial index: only rows still waiting for auto-categorization
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_bt_uncategorized
+                    ON bank_transactions (user_id, id)
+                    INCLUDE (description)
+                    WHERE category_id IS NULL AND NOT erpnext_synced
+                """))
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_bank_transactions_statement_id
+                    ON bank_transactions (statement_id)
+                """))
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_txn_date_desc
+                    ON transactions (transaction_date DESC)
+                """))
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_invoice_items_invoice_id
+                    ON invoice_items (invoice_id)
+                """))
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_invoices_user_status_due
+                    ON invoices (user_id, status, due_date)
+                    INCLUDE (outstanding_amount, total_amount)
+                """))
+                
+                # Ascending single-column indexes superseded by the DESC ones above
+                conn.execute(text("DROP INDEX IF EXISTS ix_email_statements_received_date"))
+                conn.execute(text("DROP INDEX IF EXISTS ix_bank_transactions_date"))
+                conn.execute(text("DROP INDEX IF EXISTS ix_transactions_transaction_date"))
+                print("   ✅ Done!")
+                
+                print("\n4️⃣ Backfilling email_statements.transaction_count...")
+                conn.execute(text("""
+                    UPDATE email_statements es
+                    SET transaction_count = (
+                        SELECT COUNT(*) FROM bank_transactions bt
+                        WHERE bt.statement_id = es.id
+                    )
+                """))
+                conn.execute(text("""
+                    ALTER TABLE email_statements
+                    ALTER COLUMN transaction_count SET DEFAULT 0,
+                    ALTER COLUMN transaction_count SET NOT NULL
+                """))
+                print("   ✅ Done!")
+                
+                print("\n5️⃣ Setting server-side UTC timestamp defaults...")
+                for table in ('users', 'bank_accounts', 'transactions',
+                              'google_credentials', 'bank_transactions',
+                              'email_statements', 'invoices', 'erpnext_configs'):
+                    conn.execute(text(f"""
+                        ALTER TABLE {table}
+                        ALTER COLUMN created_at SET DEFAULT timezone('utc', now()),
+                        ALTER COLUMN updated_at SET DEFAULT timezone('utc', now())
+                    """))
+                conn.execute(text("""
+                    ALTER TABLE transaction_categories
+                    ALTER COLUMN created_at SET DEFAULT timezone('utc', now()),
+                    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT timezone('utc', now())
+                """))
+                # The category cache's version key reads max(updated_at), so
+                # bump it on every UPDATE, including raw SQL that skips the ORM
+                conn.execute(text("""
+                    CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+                    BEGIN
+                        NEW.updated_at = timezone('utc', clock_timestamp());
+                        RETURN NEW;
+                    END
+                    $$ LANGUAGE plpgsql
+                """))
+                conn.execute(text("""
+                    DROP TRIGGER IF EXISTS trg_transaction_categories_touch
+                    ON transaction_categories
+                """))
+                conn.execute(text("""
+                    CREATE TRIGGER trg_transaction_categories_touch
+                    BEFORE UPDATE ON transaction_categories
+                    FOR EACH ROW EXECUTE FUNCTION touch_updated_at()
+                """))
+                conn.execute(text("""
+                    ALTER TABLE invoice_items
+                    ALTER COLUMN created_at SET DEFAULT timezone('utc', now())
+                """))
+                conn.execute(text("""
+                    ALTER TABLE erpnext_sync_logs
+                    ALTER COLUMN sync_date SET DEFAULT timezone('utc', now())
+                """))
+                print("   ✅ Done!")
+                
+                print("\n6️⃣ Storing invoice money as integer cents...")
+                result = conn.execute(text("""
+                    SELECT data_type
+                    FROM information_schema.columns
+                    WHERE table_name = 'invoices'
+                    AND column_name = 'subtotal'
+                """))
+                row = result.fetchone()
+                
+                if row and row[0] == 'numeric':
+                    # The rollup view depends on these columns; rebuilt below
+                    conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_invoice_status"))
+                    money_columns = {
+                        'invoices': ('subtotal', 'tax_amount', 'discount_amount',
+                                     'total_amount', 'paid_amount', 'outstanding_amount'),
+                        'invoice_items': ('quantity', 'unit_price', 'total'),
+                    }
+                    for table, columns in money_columns.items():
+                        conn.execute(text(f"""
+                            ALTER TABLE {table} {', '.join(
+                                f'ALTER COLUMN {c} TYPE BIGINT USING round({c} * 100)::bigint'
+                                for c in columns
+                            )}
+                        """))
+                    print("   ✅ Converted!")
+                else:
+                    print("   ✅ Already correct!")
+                
+                print("\n7️⃣ Generating invoices.outstanding_amount...")
+                result = conn.execute(text("""
+                    SELECT is_generated
+                    FROM information_schema.columns
+                    WHERE table_name = 'invoices'
+                    AND column_name = 'outstanding_amount'
+                """))
+                row = result.fetchone()
+                
+                if row and row[0] != 'ALWAYS':
+                    # Dropping the column also drops the rollup view and the
+                    # index that INCLUDEs it; both are recreated
+                    conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_invoice_status"))
+                    conn.execute(text("ALTER TABLE invoices DROP COLUMN outstanding_amount"))
+                    conn.execute(text("""
+                        ALTER TABLE invoices
+                        ADD COLUMN outstanding_amount BIGINT GENERATED ALWAYS AS
+                        (COALESCE(total_amount, 0) - COALESCE(paid_amount, 0)) STORED
+                    """))
+                    conn.execute(text("""
+                        CREATE INDEX IF NOT EXISTS ix_invoices_user_status_due
+                        ON invoices (user_id, status, due_date)
+                        INCLUDE (outstanding_amount, total_amount)
+                    """))
+                    print("   ✅ Fixed!")
+                else:
+                    print("   ✅ Already correct!")
+                
+                print("\n8️⃣ Creating invoice status rollup view...")
+                conn.execute(text("""
+                    CREATE MATERIALIZED VIEW IF NOT EXISTS mv_invoice_status AS
+                    SELECT user_id,
+                           status,
+                           COUNT(*) AS cnt,
+                           COALESCE(SUM(outstanding_amount), 0) / 100.0 AS outstanding,
+                           COALESCE(SUM(CASE
+                               WHEN due_date < CURRENT_DATE
+                                    AND status NOT IN ('paid', 'cancelled')
+                               THEN outstanding_amount ELSE 0
+                           END), 0) / 100.0 AS overdue_amount
+                    FROM invoices
+                    GROUP BY user_id, status
+                """))
+                # Unique index required by REFRESH ... CONCURRENTLY
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_invoice_status
+                    ON mv_invoice_status (user_id, status)
+                """))
+                print("   ✅ Done!")
+                
+                print("\n9️⃣ Partitioning bank_transactions by month...")
+                relkind = conn.execute(text("""
+                    SELECT relkind FROM pg_class
+                    WHERE relname = 'bank_transactions'
+                """)).scalar()
+                
+                if relkind == 'r':
+                    conn.execute(text("ALTER TABLE bank_transactions RENAME TO bank_transactions_old"))
+                    # Indexes and foreign keys are replayed onto the new table below
+                    indexes = conn.execute(text("""
+                        SELECT indexdef FROM pg_indexes
+                        WHERE tablename = 'bank_transactions_old'
+                        AND indexname NOT LIKE '%_pkey'
+                    """)).scalars().all()
+                    foreign_keys = conn.execute(text("""
+                        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+                        WHERE conrelid = 'bank_transactions_old'::regclass
+                        AND contype = 'f'
+                    """)).all()
+                    sequence = conn.execute(text(
+                        "SELECT pg_get_serial_sequence('bank_transactions_old', 'id')"
+                    )).scalar()
+                    
+                    conn.execute(text("""
+                        CREATE TABLE bank_transactions
+                        (LIKE bank_transactions_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+                        PARTITION BY RANGE (date)
+                    """))
+                    first_month, last_month = conn.execute(text("""
+                        SELECT date_trunc('month', COALESCE(MIN(date), CURRENT_DATE))::date,
+                               MAX(date)
+                        FROM bank_transactions_old
+                    """)).one()
+                    create_month_partitions(conn, first_month, last_month)
+                    conn.execute(text("""
+                        CREATE TABLE bank_transactions_default
+                        PARTITION OF bank_transactions DEFAULT
+                    """))
+                    conn.execute(text("INSERT INTO bank_transactions SELECT * FROM bank_transactions_old"))
+                    
+                    if sequence:
+                        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY bank_transactions.id"))
+                    conn.execute(text("DROP TABLE bank_transactions_old"))
+                    
+                    # The partition key must be part of the primary key
+                    conn.execute(text("ALTER TABLE bank_transactions ADD PRIMARY KEY (id, date)"))
+                    for name, definition in foreign_keys:
+                        conn.execute(text(
+                            f"ALTER TABLE bank_transactions ADD CONSTRAINT {name} {definition}"
+                        ))
+                    for definition in indexes:
+                        conn.execute(text(definition.replace(
+                            'bank_transactions_old', 'bank_transactions'
+                        )))
+                    print("   ✅ Converted!")
+                else:
+                    # Keep a year of partitions ahead of today
+                    create_month_partitions(conn, date.today().replace(day=1))
+                    print("   ✅ Already partitioned!")
+                
+                # Block-range index: tiny, and suits append-mostly dated rows
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_bt_date_brin
+                    ON bank_transactions USING brin (date)
+                """))
+                print("   ✅ Done!")
+                
                 trans.commit()
                 print("\n" + "=" * 50)
                 print("✅ Schema fixes complete!")
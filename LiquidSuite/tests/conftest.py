@@ -7,6 +7,10 @@ Pytest Configuration and Fixtures
 import sys
 import os
 import pytest
+from functools import lru_cache
+from sqlalchemy import event
+from flask_sqlalchemy.session import Session
+from werkzeug.security import generate_password_hash
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -15,22 +19,125 @@ from lsuite import create_app
 from lsuite.extensions import db
 from lsuite.models import User, TransactionCategory
 
+# Hashed once at import; fixtures assign it instead of calling set_password
+_TEST_PASSWORD_HASH = generate_password_hash('testpassword', method='pbkdf2:sha256:1')
 
-@pytest.fixture(scope='function')
+
+def pytest_configure(config):
+    """Set the test environment before any app is created (or xdist worker starts).
+    
+    Each xdist worker is its own process, so with the default in-memory
+    SQLite database every worker gets a private database. A shared
+    TEST_DATABASE_URL would have every worker create, seed and drop the
+    same tables, so parallel runs against it are refused up front.
+    """
+    os.environ.setdefault('FLASK_ENV', 'testing')
+    
+    database_url = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+    if config.getoption('numprocesses', default=None) and not database_url.startswith('sqlite'):
+        raise pytest.UsageError(
+            'TEST_DATABASE_URL points at a shared database; run without xdist (-n0)'
+        )
+
+
+def _enable_sqlite_savepoints(engine):
+    """Let SAVEPOINT work on pysqlite, whose implicit BEGIN handling breaks it."""
+    @event.listens_for(engine, 'connect')
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine, 'begin')
+    def do_begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+
+class _ConnectionSession(Session):
+    """Session that always uses its bound connection.
+    
+    Flask-SQLAlchemy's Session routes every query to the app's engine,
+    which would bypass the per-test connection.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        return bind or self.bind
+
+
+@lru_cache(maxsize=None)
+def _cached_app(config_name):
+    """Build each configured app once, however many fixtures ask for it."""
+    return create_app(config_name)
+
+
+@pytest.fixture(scope='session')
 def app():
-    """Create and configure a test application instance."""
-    app = create_app('testing')
+    """Create the test application and schema once for the whole run."""
+    app = _cached_app('testing')
     
     # Disable CSRF for testing
     app.config['WTF_CSRF_ENABLED'] = False
     
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            _enable_sqlite_savepoints(db.engine)
         db.create_all()
         yield app
         db.session.remove()
         db.drop_all()
 
 
+@pytest.fixture(scope='session', autouse=True)
+def _warmup_templates(app):
+    """Compile the auth templates and build the URL map before any test.
+    
+    The app is built once per session, so this only moves the one-off
+    cost of the first render out of whichever test happens to run first.
+    A missing template fails here rather than in that test.
+    """
+    env = app.jinja_env
+    for name in ('auth/login.html', 'auth/register.html',
+                 'auth/profile.html', 'auth/change_password.html'):
+        env.get_template(name)
+    app.url_map.update()
+
+
+@pytest.fixture(scope='function', autouse=True)
+def app_ctx(app):
+    """One app context per test, shared by every fixture.
+    
+    A fresh context per test (rather than the run-wide one pushed by app)
+    keeps flask.g from leaking between tests.
+    """
+    with app.app_context():
+        yield
+
+
+@pytest.fixture(scope='function', autouse=True)
+def db_session(app, app_ctx):
+    """Run each test inside a transaction that is rolled back afterwards.
+    
+    Sessions join the outer transaction through SAVEPOINTs, so commit()
+    and rollback() in tests and views behave normally but nothing
+    outlives the test. Attributes are not expired on commit, so fixtures
+    can read the ids that the INSERT already returned without a SELECT.
+    """
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    
+    original_session = db.session
+    db.session = db._make_scoped_session({
+        'class_': _ConnectionSession,
+        'bind': connection,
+        'join_transaction_mode': 'create_savepoint',
+        'expire_on_commit': False,
+    })
+    
+    yield db.session
+    
+    db.session.remove()
+    db.session = original_session
+    transaction.rollback()
+    connection.close()
+
+
 @pytest.fixture(scope='function')
 def client(app):
     """Create a test client for the app."""
@@ -43,97 +150,117 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@pytest.fixture(scope='session')
+def shared_user_id(app):
+    """Insert the test user once for the whole run.
+    
+    Session-scoped fixtures are set up before db_session, so the row is
+    committed outside any per-test transaction and survives the rollbacks.
+    """
+    test_user = User(
+        username='testuser',
+        email='test@example.com'
+    )
+    test_user.password_hash = _TEST_PASSWORD_HASH
+    test_user.is_active = True
+    
+    db.session.add(test_user)
+    db.session.commit()
+    user_id = test_user.id
+    db.session.remove()
+    
+    return user_id
+
+
 @pytest.fixture(scope='function')
-def user(app):
-    """Create a test user."""
-    with app.app_context():
-        test_user = User(
-            username='testuser',
-            email='test@example.com'
-        )
-        test_user.set_password('testpassword')
-        test_user.is_active = True
-        
-        db.session.add(test_user)
-        db.session.commit()
-        
-        # Refresh to get the ID
-        db.session.refresh(test_user)
-        
-        yield test_user
-        
-        # Cleanup is handled by app fixture dropping all tables
+def user(app, shared_user_id):
+    """The test user, loaded into this test's session."""
+    yield db.session.get(User, shared_user_id)
 
 
 @pytest.fixture(scope='function')
-def auth_client(client, app, user):
-    """Create an authenticated test client."""
-    # FIXED: Use app context and pass user fixture
-    with app.app_context():
-        # Log in the user using the client
-        response = client.post('/auth/login', data={
-            'email': user.email,
-            'password': 'testpassword',
-            'remember_me': False
-        }, follow_redirects=True)
-        
-        # Verify login was successful
-        #assert response.status_code == 200
+def test_user(user):
+    """Alias of user, for tests written against the older fixture name"""
+    return user
+
+
+@pytest.fixture(scope='function')
+def auth_client(client, user):
+    """Create an authenticated test client.
     
-    yield client
+    Writes Flask-Login's session keys directly rather than POSTing the
+    login form, so no password check runs; the login form itself is
+    covered by test_auth.py using the plain client. Function-scoped
+    because test_logout ends the session.
+    """
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
     
-    # Logout after test
-    with app.app_context():
-        client.get('/auth/logout', follow_redirects=True)
+    return client
 
 
 @pytest.fixture(scope='function')
 def sample_categories(app):
     """Create sample transaction categories for testing"""
-    with app.app_context():
-        categories = [
-            TransactionCategory(
-                name='Test Transport',
-                erpnext_account='Transport - Test',
-                transaction_type='expense',
-                keywords='uber,taxi,bolt,ride,transport',
-                active=True
-            ),
-            TransactionCategory(
-                name='Test Food',
-                erpnext_account='Food & Dining - Test',
-                transaction_type='expense',
-                keywords='restaurant,food,lunch,dinner,meal,eat',
-                active=True
-            ),
-            TransactionCategory(
-                name='Test Income',
-                erpnext_account='Income - Test',
-                transaction_type='income',
-                keywords='payment received,salary,income,revenue,client',
-                active=True
-            )
-        ]
-        
-        for category in categories:
-            db.session.add(category)
-        
-        db.session.commit()
-        
-        yield categories
-        
+    rows = [
+        {
+            'name': 'Test Transport',
+            'erpnext_account': 'Transport - Test',
+            'transaction_type': 'expense',
+            'keywords': 'uber,taxi,bolt,ride,transport',
+            'active': True
+        },
+        {
+            'name': 'Test Food',
+            'erpnext_account': 'Food & Dining - Test',
+            'transaction_type': 'expense',
+            'keywords': 'restaurant,food,lunch,dinner,meal,eat',
+            'active': True
+        },
+        {
+            'name': 'Test Income',
+            'erpnext_account': 'Income - Test',
+            'transaction_type': 'income',
+            'keywords': 'payment received,salary,income,revenue,client',
+            'active': True
+        }
+    ]
+    
+    # Core executemany - no unit-of-work or per-row RETURNING
+    db.session.execute(TransactionCategory.__table__.insert(), rows)
+    categories = TransactionCategory.query.order_by(TransactionCategory.id).all()
+    
+    yield categories
+    
+
+
+@pytest.fixture(scope='function')
+def count_queries(app):
+    """Collect every SQL statement sent to the database during a test,
+    except the SAVEPOINTs that db_session wraps around sessions."""
+    queries = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if not statement.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')):
+            queries.append(statement)
+    
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield queries
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
 
 
 @pytest.fixture(scope='function')
 def reset_db(app):
-    """Reset the database before each test."""
-    with app.app_context():
-        db.drop_all()
-        db.create_all()
+    """Empty every table for the test.
+    
+    The DELETEs run inside db_session's transaction, so the shared rows
+    come back when it rolls back; no DDL is issued mid-run.
+    """
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
     yield
-    with app.app_context():
-        db.session.remove()
-        db.drop_all()
 # ============================================================================
 # ADD THESE FIXTURES TO THE END OF YOUR EXISTING conftest.py
 # DO NOT REPLACE - JUST ADD TO THE BOTTOM
@@ -143,115 +270,119 @@ from lsuite.models import BankAccount, BankTransaction
 from datetime import date
 from decimal import Decimal
 
+ZERO = Decimal('0.00')
+
+
+@pytest.fixture(scope='session')
+def shared_bank_account_id(app, shared_user_id):
+    """Insert the test bank account once for the whole run"""
+    account = BankAccount(
+        user_id=shared_user_id,
+        account_name='Test Savings Account',
+        account_number='1234567890',
+        bank_name='Test Bank',
+        account_type='Savings',
+        currency='ZAR',
+        balance=Decimal('10000.00'),
+        is_active=True
+    )
+    db.session.add(account)
+    db.session.commit()
+    account_id = account.id
+    db.session.remove()
+    
+    return account_id
+
 
 @pytest.fixture(scope='function')
-def test_bank_account(app, user):
-    """Create a test bank account for transactions"""
-    with app.app_context():
-        account = BankAccount(
-            user_id=user.id,
-            account_name='Test Savings Account',
-            account_number='1234567890',
-            bank_name='Test Bank',
-            account_type='Savings',
-            currency='ZAR',
-            balance=Decimal('10000.00'),
-            is_active=True
-        )
-        db.session.add(account)
-        db.session.commit()
-        db.session.refresh(account)
-        
-        yield account
+def test_bank_account(app, user, shared_bank_account_id):
+    """The test bank account, loaded into this test's session"""
+    yield db.session.get(BankAccount, shared_bank_account_id)
 
 
 @pytest.fixture(scope='function')
-def test_categories(app, sample_categories):
-    """Reuse existing sample_categories but with specific test names"""
-    with app.app_context():
-        # Clear existing and create specific ones for bridge tests
-        TransactionCategory.query.delete()
-        
-        categories = [
-            TransactionCategory(
-                name='Transport',
-                erpnext_account='Transport Expenses - Company',
-                transaction_type='expense',
-                keywords='uber, taxi, fuel, petrol',
-                active=True
-            ),
-            TransactionCategory(
-                name='Food',
-                erpnext_account='Food Expenses - Company',
-                transaction_type='expense',
-                keywords='restaurant, coffee, lunch',
-                active=True
-            ),
-            TransactionCategory(
-                name='Bank Fees',
-                erpnext_account='Bank Charges - Company',
-                transaction_type='expense',
-                keywords='bank fee, service charge',
-                active=True
-            )
-        ]
-        
-        for cat in categories:
-            db.session.add(cat)
-        db.session.commit()
-        
-        yield categories
+def test_categories(app):
+    """Create the categories the bridge tests match against"""
+    rows = [
+        {
+            'name': 'Transport',
+            'erpnext_account': 'Transport Expenses - Company',
+            'transaction_type': 'expense',
+            'keywords': 'uber, taxi, fuel, petrol',
+            'active': True
+        },
+        {
+            'name': 'Food',
+            'erpnext_account': 'Food Expenses - Company',
+            'transaction_type': 'expense',
+            'keywords': 'restaurant, coffee, lunch',
+            'active': True
+        },
+        {
+            'name': 'Bank Fees',
+            'erpnext_account': 'Bank Charges - Company',
+            'transaction_type': 'expense',
+            'keywords': 'bank fee, service charge',
+            'active': True
+        }
+    ]
+    
+    # Core executemany - no unit-of-work or per-row RETURNING
+    db.session.execute(TransactionCategory.__table__.insert(), rows)
+    categories = TransactionCategory.query.order_by(TransactionCategory.id).all()
+    
+    yield categories
 
 
 @pytest.fixture(scope='function')
-def test_transactions(app, user, test_bank_account):
+def test_transactions(app, user, test_bank_account, test_categories):
     """Create test transactions for bridge tests"""
-    with app.app_context():
-        transactions = [
-            BankTransaction(
-                user_id=user.id,
-                bank_account_id=test_bank_account.id,
-                date=date(2024, 1, 1),
-                description='UBER TRIP TO AIRPORT',
-                withdrawal=Decimal('250.00'),
-                deposit=Decimal('0.00'),
-                balance=Decimal('5000.00'),
-                reference_number='TXN001'
-            ),
-            BankTransaction(
-                user_id=user.id,
-                bank_account_id=test_bank_account.id,
-                date=date(2024, 1, 2),
-                description='STARBUCKS COFFEE SHOP',
-                withdrawal=Decimal('45.00'),
-                deposit=Decimal('0.00'),
-                balance=Decimal('4955.00'),
-                reference_number='TXN002'
-            ),
-            BankTransaction(
-                user_id=user.id,
-                bank_account_id=test_bank_account.id,
-                date=date(2024, 1, 3),
-                description='MONTHLY BANK FEE',
-                withdrawal=Decimal('65.00'),
-                deposit=Decimal('0.00'),
-                balance=Decimal('4890.00'),
-                reference_number='TXN003'
-            ),
-            BankTransaction(
-                user_id=user.id,
-                bank_account_id=test_bank_account.id,
-                date=date(2024, 1, 4),
-                description='UNKNOWN TRANSACTION',
-                withdrawal=Decimal('100.00'),
-                deposit=Decimal('0.00'),
-                balance=Decimal('4790.00'),
-                reference_number='TXN004'
-            )
-        ]
-        
-        for txn in transactions:
-            db.session.add(txn)
-        db.session.commit()
-        
-        yield transactions
+    rows = [
+        {
+            'user_id': user.id,
+            'bank_account_id': test_bank_account.id,
+            'date': date(2024, 1, 1),
+            'description': 'UBER TRIP TO AIRPORT',
+            'withdrawal': Decimal('250.00'),
+            'deposit': ZERO,
+            'balance': Decimal('5000.00'),
+            'reference_number': 'TXN001'
+        },
+        {
+            'user_id': user.id,
+            'bank_account_id': test_bank_account.id,
+            'date': date(2024, 1, 2),
+            'description': 'STARBUCKS COFFEE SHOP',
+            'withdrawal': Decimal('45.00'),
+            'deposit': ZERO,
+            'balance': Decimal('4955.00'),
+            'reference_number': 'TXN002'
+        },
+        {
+            'user_id': user.id,
+            'bank_account_id': test_bank_account.id,
+            'date': date(2024, 1, 3),
+            'description': 'MONTHLY BANK FEE',
+            'withdrawal': Decimal('65.00'),
+            'deposit': ZERO,
+            'balance': Decimal('4890.00'),
+            'reference_number': 'TXN003'
+        },
+        {
+            'user_id': user.id,
+            'bank_account_id': test_bank_account.id,
+            'date': date(2024, 1, 4),
+            'description': 'UNKNOWN TRANSACTION',
+            'withdrawal': Decimal('100.00'),
+            'deposit': ZERO,
+            'balance': Decimal('4790.00'),
+            'reference_number': 'TXN004'
+        }
+    ]
+    
+    # Core executemany - no unit-of-work or per-row RETURNING
+    db.session.execute(BankTransaction.__table__.insert(), rows)
+    db.session.flush()
+    transactions = BankTransaction.query.order_by(BankTransaction.date).all()
+    
+    yield transactions
@@ -9,16 +9,30 @@ from lsuite.models import User
 from lsuite.extensions import db
 
 
-def test_login_page(client):
+@pytest.fixture(scope='module')
+def anonymous_get(app):
+    """GET pages as an anonymous user, dispatching each path once per module"""
+    client = app.test_client()
+    responses = {}
+    
+    def get(path):
+        if path not in responses:
+            responses[path] = client.get(path)
+        return responses[path]
+    
+    return get
+
+
+def test_login_page(anonymous_get):
     """Test login page loads"""
-    response = client.get('/auth/login')
+    response = anonymous_get('/auth/login')
     assert response.status_code == 200
     assert b'Sign In' in response.data or b'Login' in response.data
 
 
-def test_register_page(client):
+def test_register_page(anonymous_get):
     """Test registration page loads"""
-    response = client.get('/auth/register')
+    response = anonymous_get('/auth/register')
     assert response.status_code == 200
     assert b'Register' in response.data
 
@@ -29,11 +43,10 @@ def test_successful_login(client, user):
         'email': user.email,
         'password': 'testpassword',
         'remember_me': False
-    }, follow_redirects=True)
+    })
     
-    assert response.status_code == 200
-    # Check for generic success - don't assume specific page content
-    assert response.data is not None
+    assert response.status_code == 302
+    assert response.location == '/'
 
 
 def test_failed_login_wrong_password(client, app, user):
@@ -63,9 +76,10 @@ def test_successful_registration(client, app):
         'email': 'newuser@example.com',
         'password': 'password123',
         'password2': 'password123'
-    }, follow_redirects=True)
+    })
     
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.location == '/auth/login'
     
     with app.app_context():
         user = User.query.filter_by(email='newuser@example.com').first()
@@ -104,9 +118,9 @@ def test_logout(auth_client):
     assert b'logged out' in response.data or b'Sign In' in response.data
 
 
-def test_protected_route_requires_login(client):
+def test_protected_route_requires_login(anonymous_get):
     """Test that protected routes redirect to login"""
-    response = client.get('/gmail/statements')
+    response = anonymous_get('/gmail/statements')
     
     assert response.status_code == 302
     assert '/auth/login' in response.location
@@ -125,10 +139,11 @@ def test_profile_update(auth_client, app, user):
     response = auth_client.post('/auth/profile', data={
         'username': 'updateduser',
         'email': 'test@example.com'
-    }, follow_redirects=True)
+    })
     
     # Check that update was processed
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.location == '/auth/profile'
     
     with app.app_context():
         updated_user = User.query.filter_by(email='test@example.com').first()
@@ -141,9 +156,10 @@ def test_change_password(auth_client, app, user):
         'current_password': 'testpassword',
         'new_password': 'newpassword123',
         'new_password2': 'newpassword123'
-    }, follow_redirects=True)
+    })
     
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.location == '/auth/profile'
     
     with app.app_context():
         user_in_db = User.query.filter_by(email='test@example.com').first()
@@ -4,99 +4,9 @@
 """
 Tests for Bridge functionality (categorization and sync)
 """
-import pytest
 from lsuite.models import TransactionCategory, BankTransaction
 from lsuite.bridge.services import CategorizationService
 from lsuite.extensions import db
-from datetime import date
-from decimal import Decimal
-
-
-@pytest.fixture
-def test_categories(test_user):
-    """Create test categories"""
-    categories = [
-        TransactionCategory(
-            name='Transport',
-            erpnext_account='Transport Expenses - Company',
-            transaction_type='expense',
-            keywords='uber, taxi, fuel, petrol',
-            active=True
-        ),
-        TransactionCategory(
-            name='Food',
-            erpnext_account='Food Expenses - Company',
-            transaction_type='expense',
-            keywords='restaurant, coffee, lunch',
-            active=True
-        ),
-        TransactionCategory(
-            name='Bank Fees',
-            erpnext_account='Bank Charges - Company',
-            transaction_type='expense',
-            keywords='bank fee, service charge',
-            active=True
-        )
-    ]
-    
-    for cat in categories:
-        db.session.add(cat)
-    db.session.commit()
-    
-    return categories
-
-
-@pytest.fixture
-def test_transactions(test_user, test_bank_account, test_categories):
-    """Create test transactions"""
-    transactions = [
-        BankTransaction(
-            user_id=test_user.id,
-            bank_account_id=test_bank_account.id,
-            date=date(2024, 1, 1),
-            description='UBER TRIP TO AIRPORT',
-            withdrawal=Decimal('250.00'),
-            deposit=Decimal('0.00'),
-            balance=Decimal('5000.00'),
-            reference_number='TXN001'
-        ),
-        BankTransaction(
-            user_id=test_user.id,
-            bank_account_id=test_bank_account.id,
-            date=date(2024, 1, 2),
-            description='STARBUCKS COFFEE SHOP',
-            withdrawal=Decimal('45.00'),
-            deposit=Decimal('0.00'),
-            balance=Decimal('4955.00'),
-            reference_number='TXN002'
-        ),
-        BankTransaction(
-            user_id=test_user.id,
-            bank_account_id=test_bank_account.id,
-            date=date(2024, 1, 3),
-            description='MONTHLY BANK FEE',
-            withdrawal=Decimal('65.00'),
-            deposit=Decimal('0.00'),
-            balance=Decimal('4890.00'),
-            reference_number='TXN003'
-        ),
-        BankTransaction(
-            user_id=test_user.id,
-            bank_account_id=test_bank_account.id,
-            date=date(2024, 1, 4),
-            description='UNKNOWN TRANSACTION',
-            withdrawal=Decimal('100.00'),
-            deposit=Decimal('0.00'),
-            balance=Decimal('4790.00'),
-            reference_number='TXN004'
-        )
-    ]
-    
-    for txn in transactions:
-        db.session.add(txn)
-    db.session.commit()
-    
-    return transactions
 
 
 def test_suggest_category(app, test_categories):
@@ -148,36 +58,25 @@ def test_auto_categorize_all(app, test_transactions, test_categories):
         # Run auto-categorization
         categorized, total = service.auto_categorize_all()
         
-        # Refresh session to get updated data
-        db.session.expire_all()
-        
         # Check results
         assert total == 4  # Total uncategorized transactions
         assert categorized == 3  # Should categorize 3 out of 4
         
         # Verify specific categorizations
-        uber_txn = BankTransaction.query.filter(
-            BankTransaction.description.like('%UBER%')
-        ).first()
+        uber_txn = BankTransaction.query.filter_by(reference_number='TXN001').first()
         assert uber_txn.category_id is not None
         assert uber_txn.category.name == 'Transport'
         
-        coffee_txn = BankTransaction.query.filter(
-            BankTransaction.description.like('%COFFEE%')
-        ).first()
+        coffee_txn = BankTransaction.query.filter_by(reference_number='TXN002').first()
         assert coffee_txn.category_id is not None
         assert coffee_txn.category.name == 'Food'
         
-        fee_txn = BankTransaction.query.filter(
-            BankTransaction.description.like('%BANK FEE%')
-        ).first()
+        fee_txn = BankTransaction.query.filter_by(reference_number='TXN003').first()
         assert fee_txn.category_id is not None
         assert fee_txn.category.name == 'Bank Fees'
         
         # Unknown transaction should remain uncategorized
-        unknown_txn = BankTransaction.query.filter(
-            BankTransaction.description.like('%UNKNOWN%')
-        ).first()
+        unknown_txn = BankTransaction.query.filter_by(reference_number='TXN004').first()
         assert unknown_txn.category_id is None
 
 
@@ -243,9 +142,6 @@ def test_category_statistics(app, test_transactions, test_categories):
         # Categorize transactions
         service.auto_categorize_all()
         
-        # Refresh session
-        db.session.expire_all()
-        
         # Check statistics
         transport_cat = TransactionCategory.query.filter_by(name='Transport').first()
         assert transport_cat.transactions.count() == 1
@@ -265,9 +161,7 @@ def test_recategorize_transaction(app, test_transactions, test_categories):
         service.auto_categorize_all()
         
         # Get the UBER transaction
-        uber_txn = BankTransaction.query.filter(
-            BankTransaction.description.like('%UBER%')
-        ).first()
+        uber_txn = BankTransaction.query.filter_by(reference_number='TXN001').first()
         
         # Verify it's categorized as Transport
         assert uber_txn.category.name == 'Transport'
@@ -277,11 +171,9 @@ def test_recategorize_transaction(app, test_transactions, test_categories):
         uber_txn.category_id = food_cat.id
         db.session.commit()
         
-        # Verify change
-        db.session.expire_all()
-        uber_txn = BankTransaction.query.filter(
-            BankTransaction.description.like('%UBER%')
-        ).first()
+        # Verify change - only the stale relationship needs reloading
+        db.session.expire(uber_txn, ['category'])
+        uber_txn = BankTransaction.query.filter_by(reference_number='TXN001').first()
         assert uber_txn.category.name == 'Food'
 
 
@@ -298,9 +190,7 @@ def test_inactive_categories_not_used(app, test_transactions, test_categories):
         categorized, total = service.auto_categorize_all()
         
         # UBER transaction should NOT be categorized
-        uber_txn = BankTransaction.query.filter(
-            BankTransaction.description.like('%UBER%')
-        ).first()
+        uber_txn = BankTransaction.query.filter_by(reference_number='TXN001').first()
         assert uber_txn.category_id is None
         
         # But COFFEE and BANK FEE should still be categorized
@@ -0,0 +1,107 @@
+"""
+Test Main Blueprint - Dashboard
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from config import TestConfig, config
+from lsuite import create_app
+from lsuite.models import EmailStatement, BankTransaction, TransactionCategory
+from lsuite.extensions import db
+
+
+# SELECTs the dashboard issues: the stats aggregate, recent statements,
+# recent transactions, category breakdown, recent syncs and the active
+# ERPNext config (the logged-in user is already in the test session)
+DASHBOARD_QUERY_BUDGET = 6
+
+
+def test_dashboard_query_budget(app, auth_client, user, count_queries):
+    """Dashboard query count must not grow with the number of rows shown"""
+    with app.app_context():
+        category = TransactionCategory(
+            name='Budget Category',
+            erpnext_account='Budget Account',
+            transaction_type='expense',
+            keywords='budget'
+        )
+        statements = [
+            EmailStatement(
+                user_id=user.id,
+                gmail_id=f'budget-{i}',
+                subject=f'Statement {i}',
+                sender='bank@test.com',
+                received_date=datetime.utcnow() - timedelta(days=i),
+                bank_name='testbank'
+            )
+            for i in range(5)
+        ]
+        db.session.add(category)
+        db.session.add_all(statements)
+        # One flush assigns every id needed below
+        db.session.flush()
+        
+        # Core executemany; the dashboard never reads transaction_count
+        db.session.execute(BankTransaction.__table__.insert(), [
+            {
+                'user_id': user.id,
+                'statement_id': statement.id,
+                'category_id': category.id,
+                'date': date(2024, 1, i * 2 + j + 1),
+                'description': f'Budget transaction {i}-{j}',
+                'withdrawal': Decimal('10.00')
+            }
+            for i, statement in enumerate(statements)
+            for j in range(2)
+        ])
+        db.session.commit()
+    
+    count_queries.clear()
+    response = auth_client.get('/')
+    
+    assert response.status_code == 200
+    assert len(count_queries) <= DASHBOARD_QUERY_BUDGET, '\n'.join(count_queries)
+
+
+def test_pages_render_without_optional_blueprints(app, user, monkeypatch):
+    """/ and /about must not link into blueprints that are switched off"""
+    class MinimalConfig(TestConfig):
+        ENABLE_GMAIL_BLUEPRINT = False
+        ENABLE_ERPNEXT_BLUEPRINT = False
+        ENABLE_BRIDGE_BLUEPRINT = False
+        ENABLE_API_BLUEPRINT = False
+    
+    monkeypatch.setitem(config, 'minimal', MinimalConfig)
+    minimal_app = create_app('minimal')
+    assert set(minimal_app.blueprints) == {'main', 'auth'}
+    
+    # Rows in the recent lists exercise the per-row detail links too
+    statement = EmailStatement(
+        user_id=user.id,
+        gmail_id='minimal-1',
+        subject='Statement',
+        sender='bank@test.com',
+        received_date=datetime.utcnow(),
+        bank_name='testbank'
+    )
+    db.session.add(statement)
+    db.session.flush()
+    db.session.add(BankTransaction(
+        user_id=user.id,
+        statement_id=statement.id,
+        date=date(2024, 1, 1),
+        description='Minimal transaction',
+        withdrawal=Decimal('10.00')
+    ))
+    db.session.flush()
+    
+    # db.session is still bound to this test's connection, so the minimal
+    # app reads the same schema and rows
+    client = minimal_app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    
+    for path in ('/', '/about'):
+        response = client.get(path)
+        assert response.status_code == 200, path
+        assert b'/gmail/' not in response.data
@@ -2,10 +2,12 @@
 Test Database Models
 """
 import pytest
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from sqlalchemy.dialects import postgresql
 from lsuite.models import (
-    User, GoogleCredential, EmailStatement, BankTransaction,
-    TransactionCategory, ERPNextConfig, ERPNextSyncLog
+    MoneyCents, User, utcnow, GoogleCredential, EmailStatement, BankTransaction,
+    TransactionCategory, ERPNextConfig, ERPNextSyncLog, Invoice, InvoiceItem
 )
 from lsuite.extensions import db
 
@@ -50,6 +52,32 @@ def test_transaction_category_model(app):
         assert 'sample' in keywords  # Changed from 'match' to 'sample'
 
 
+def test_active_categories_keep_pending_changes(app):
+    """active_categories() must not overwrite edits already in the session"""
+    with app.app_context():
+        category = TransactionCategory(
+            name='Cached Category',
+            erpnext_account='Test Account',
+            transaction_type='expense',
+            keywords='alpha'
+        )
+        db.session.add(category)
+        db.session.commit()
+        # Warm the cache with the committed keywords
+        TransactionCategory.active_categories()
+        
+        category.keywords = 'alpha, gamma'
+        categories = TransactionCategory.active_categories()
+        
+        assert category in categories
+        assert category.keywords == 'alpha, gamma'
+        assert category in db.session.dirty
+        
+        db.session.commit()
+        db.session.expire(category, ['keywords'])
+        assert category.keywords == 'alpha, gamma'
+
+
 def test_bank_transaction_model(app):
     """Test BankTransaction model"""
     with app.app_context():
@@ -127,6 +155,40 @@ def test_email_statement_model(app):
         assert statement.transaction_count == 5
 
 
+def test_statement_transaction_count_maintained(app, user):
+    """transaction_count follows BankTransaction inserts and deletes"""
+    with app.app_context():
+        statement = EmailStatement(
+            user_id=user.id,
+            gmail_id='count123',
+            subject='Bank Statement',
+            sender='bank@test.com',
+            received_date=datetime.utcnow(),
+            bank_name='testbank'
+        )
+        db.session.add(statement)
+        db.session.commit()
+        
+        for i in range(3):
+            db.session.add(BankTransaction(
+                user_id=user.id,
+                statement_id=statement.id,
+                date=date.today(),
+                description=f'Transaction {i}',
+                withdrawal=10.00 * (i + 1)
+            ))
+        db.session.commit()
+        
+        db.session.expire(statement, ['transaction_count'])
+        assert statement.transaction_count == 3
+        
+        db.session.delete(statement.transactions.first())
+        db.session.commit()
+        
+        db.session.expire(statement, ['transaction_count'])
+        assert statement.transaction_count == 2
+
+
 def test_erpnext_config_model(app):
     """Test ERPNextConfig model"""
     with app.app_context():
@@ -197,3 +259,173 @@ def test_google_credential_model(app, user):
         
         assert cred.is_authenticated
         assert cred.access_token == 'test_token'
+
+
+def test_invoice_status_refresh_skipped_without_view(app, count_queries):
+    """refresh_status_view() is a no-op where fix_schema.py never ran"""
+    with app.app_context():
+        assert Invoice.refresh_status_view() is False
+        assert count_queries == []
+
+
+def test_invoice_totals_before_flush(app, user):
+    """calculate_totals() sees the items of an invoice that has no id yet"""
+    with app.app_context():
+        invoice = Invoice(
+            user_id=user.id,
+            invoice_number='INV-PENDING',
+            invoice_date=date.today(),
+            customer_name='Customer',
+            tax_rate=Decimal('15.00')
+        )
+        item = InvoiceItem(description='Widget', quantity=2, unit_price=Decimal('10.00'))
+        item.calculate_total()
+        invoice.items.append(item)
+        db.session.add(invoice)
+        
+        invoice.calculate_totals()
+        
+        assert invoice.subtotal == Decimal('20.00')
+        assert invoice.tax_amount == Decimal('3.00')
+        assert invoice.total_amount == Decimal('23.00')
+
+
+def test_money_cents_round_trip(app, user):
+    """MoneyCents columns come back as the 2-place Decimal that went in"""
+    with app.app_context():
+        invoice = Invoice(
+            user_id=user.id,
+            invoice_number='INV-CENTS',
+            invoice_date=date.today(),
+            customer_name='Customer',
+            subtotal=Decimal('33.33'),
+            total_amount=19.99
+        )
+        db.session.add(invoice)
+        db.session.flush()
+        invoice.discount_amount = None
+        db.session.flush()
+        db.session.expire(invoice)
+        
+        assert invoice.subtotal == Decimal('33.33')
+        assert invoice.total_amount == Decimal('19.99')
+        assert invoice.discount_amount is None
+        assert MoneyCents.to_cents(0.1 + 0.2) == 30
+
+
+def test_invoice_item_total_rounds_half_up(app):
+    """Fractional quantities round the line total to the nearest cent"""
+    with app.app_context():
+        item = InvoiceItem(description='Hours', quantity=Decimal('1.5'), unit_price=Decimal('0.33'))
+        item.calculate_total()
+        
+        assert item.total == Decimal('0.50')
+
+
+def test_invoice_outstanding_amount_generated(app, user):
+    """outstanding_amount is computed by the database on flush"""
+    with app.app_context():
+        invoice = Invoice(
+            user_id=user.id,
+            invoice_number='INV-OUTSTANDING',
+            invoice_date=date.today(),
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            paid_amount=Decimal('40.00')
+        )
+        db.session.add(invoice)
+        db.session.flush()
+        
+        assert invoice.outstanding_amount == Decimal('60.00')
+        
+        invoice.paid_amount = Decimal('100.00')
+        db.session.flush()
+        
+        assert invoice.outstanding_amount == Decimal('0.00')
+
+
+def test_recompute_totals_matches_calculate_totals(app, user):
+    """The set-based recompute gives the same totals as the per-invoice one"""
+    with app.app_context():
+        invoices = []
+        for number, tax_rate, discount, prices in [
+            ('INV-BULK-1', Decimal('15.00'), Decimal('5.00'), ['10.00', '0.33', '7.49']),
+            ('INV-BULK-2', Decimal('14.50'), None, ['99.99']),
+            ('INV-BULK-3', Decimal('15.00'), Decimal('0.00'), []),
+        ]:
+            invoice = Invoice(
+                user_id=user.id,
+                invoice_number=number,
+                invoice_date=date.today(),
+                customer_name='Customer',
+                tax_rate=tax_rate
+            )
+            for price in prices:
+                item = InvoiceItem(description='Line', quantity=Decimal('1.5'), unit_price=Decimal(price))
+                item.calculate_total()
+                invoice.items.append(item)
+            db.session.add(invoice)
+            db.session.flush()
+            invoice.discount_amount = discount
+            invoices.append(invoice)
+        
+        expected = {}
+        for invoice in invoices:
+            invoice.calculate_totals()
+            expected[invoice.id] = (invoice.subtotal, invoice.tax_amount, invoice.total_amount)
+            invoice.subtotal = invoice.tax_amount = invoice.total_amount = Decimal('0.00')
+        db.session.flush()
+        
+        Invoice.recompute_totals(expected)
+        db.session.expire_all()
+        
+        for invoice in invoices:
+            assert (invoice.subtotal, invoice.tax_amount, invoice.total_amount) == expected[invoice.id]
+
+
+def test_erpnext_format_bulk_matches_per_row(app, user, test_bank_account):
+    """to_erpnext_format_bulk() builds the same dicts as to_erpnext_format()"""
+    with app.app_context():
+        with_account = BankTransaction(
+            user_id=user.id,
+            bank_account_id=test_bank_account.id,
+            date=date(2024, 3, 1),
+            posting_date=date(2024, 3, 2),
+            description='Card purchase',
+            withdrawal=Decimal('12.34'),
+            currency='ZAR',
+            reference_number='BULK-1'
+        )
+        without_account = BankTransaction(
+            user_id=user.id,
+            date=date(2024, 3, 3),
+            description='Salary',
+            deposit=Decimal('1000.00'),
+            reference_number='BULK-2'
+        )
+        db.session.add_all([with_account, without_account])
+        db.session.flush()
+        
+        bulk = BankTransaction.to_erpnext_format_bulk(
+            BankTransaction.id.in_([with_account.id, without_account.id])
+        )
+        
+        assert bulk == [with_account.to_erpnext_format(), without_account.to_erpnext_format()]
+        assert bulk[0]['bank_account'] == 'Test Savings Account'
+        assert bulk[1]['bank_account'] is None
+        assert bulk[1]['posting_date'] is None
+
+
+def test_utcnow_defaults_are_utc(app, user):
+    """Server-side timestamps are UTC on both SQLite and Postgres"""
+    with app.app_context():
+        assert str(utcnow().compile(dialect=postgresql.dialect())) == "timezone('utc', now())"
+        
+        category = TransactionCategory(
+            name='Clock', erpnext_account='Clock - C', transaction_type='expense'
+        )
+        db.session.add(category)
+        db.session.flush()
+        db.session.refresh(category)
+        
+        assert abs(category.created_at - datetime.utcnow()) < timedelta(minutes=1)